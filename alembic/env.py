@@ -1,9 +1,9 @@
 # alembic/env.py
-from config import DATABASE_URL  # Import from your config.py
+# Import from your config.py
+from config import DATABASE_URL, DB_MIGRATION_STATEMENT_TIMEOUT_MS
 from database.models import User, Category, Transactions  # Import all your models
-from database.db_client import Base
+from database.db_client import Base, create_db_engine
 from logging.config import fileConfig
-from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 from alembic import context
 import os
@@ -67,9 +67,12 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
-    connectable = engine_from_config(
-        config.get_section(config.config_ini_section, {}),
-        prefix="sqlalchemy.",
+    # Same engine settings as the app, minus pool sizing (one connection is
+    # enough) and with the migration statement timeout.
+    connectable = create_db_engine(
+        config.get_main_option("sqlalchemy.url"),
+        pooled=False,
+        statement_timeout_ms=DB_MIGRATION_STATEMENT_TIMEOUT_MS,
         poolclass=pool.NullPool,
     )
 
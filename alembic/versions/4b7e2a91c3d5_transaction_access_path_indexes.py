@@ -0,0 +1,52 @@
+"""Add composite indexes on transactions
+
+Revision ID: 4b7e2a91c3d5
+Revises: create_initial_001
+Create Date: 2026-10-18 14:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4b7e2a91c3d5"
+down_revision: Union[str, Sequence[str], None] = "create_initial_001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build without locking writes on Postgres; CONCURRENTLY cannot run
+    # inside a transaction block.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_transactions_user_date_id",
+            "transactions",
+            ["user_id", sa.text("date DESC"), sa.text("id DESC")],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_transactions_user_type_date_id",
+            "transactions",
+            ["user_id", "type", sa.text("date DESC"), sa.text("id DESC")],
+            postgresql_include=["amount"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_transactions_user_category_date",
+            "transactions",
+            ["user_id", "category_id", "date"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_transactions_user_category_date", table_name="transactions")
+    op.drop_index("ix_transactions_user_type_date_id", table_name="transactions")
+    op.drop_index("ix_transactions_user_date_id", table_name="transactions")
@@ -0,0 +1,57 @@
+"""Add transaction_totals rollup table
+
+Revision ID: 9c1f5e3a7b20
+Revises: 4b7e2a91c3d5
+Create Date: 2026-10-18 15:10:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c1f5e3a7b20"
+down_revision: Union[str, Sequence[str], None] = "4b7e2a91c3d5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "transaction_totals",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "type",
+            postgresql.ENUM("Income", "Expense", name="type", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("total", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "type", "month"),
+    )
+
+    # Backfill from existing rows
+    if op.get_bind().dialect.name == "sqlite":
+        month = "date(date, 'start of month')"
+    else:
+        month = "date_trunc('month', date)::date"
+    op.execute(
+        f"""
+        INSERT INTO transaction_totals (user_id, type, month, total, count)
+        SELECT user_id, type, {month}, SUM(amount), COUNT(*)
+        FROM transactions
+        GROUP BY user_id, type, {month}
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("transaction_totals")
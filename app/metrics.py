@@ -0,0 +1,169 @@
+"""
+In-process metrics, rendered in the Prometheus text format at /metrics.
+
+Recording is a dict lookup and a few additions, so it can sit on every
+request. Histograms keep per-bucket counts and cumulate them only when
+rendered. Values that already live elsewhere (pool sizes, chat connection
+counts, cache hit counters) are read by callbacks at render time instead of
+being mirrored.
+"""
+
+import time
+from bisect import bisect_left
+from typing import Callable, Optional
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, *label_values):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self):
+        for label_values, value in self.values.items():
+            yield self.name, format_labels(self.labels, label_values), value
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labels: tuple = (), buckets=LATENCY_BUCKETS
+    ):
+        self.name, self.help, self.labels = name, help, labels
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self.series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def samples(self):
+        for label_values, (counts, total, count) in self.series.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                labels = format_labels((*self.labels, "le"), (*label_values, bound))
+                yield f"{self.name}_bucket", labels, cumulative
+            labels = format_labels(self.labels, label_values)
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+class Collected:
+    """Metric whose samples come from a callback returning {label values: value}"""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple,
+        collect: Callable[[], dict],
+        type: str = "gauge",
+    ):
+        self.name, self.help, self.labels, self.type = name, help, labels, type
+        self.collect = collect
+
+    def samples(self):
+        for label_values, value in self.collect().items():
+            yield self.name, format_labels(self.labels, label_values), value
+
+
+registry: list = []
+
+
+def register(metric):
+    registry.append(metric)
+    return metric
+
+
+def render() -> str:
+    lines = []
+    for metric in registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{labels} {value}")
+    return "\n".join(lines) + "\n"
+
+
+http_request_seconds = register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route",
+        ("method", "route"),
+    )
+)
+http_requests = register(
+    Counter(
+        "http_requests_total",
+        "HTTP responses by route and status",
+        ("method", "route", "status"),
+    )
+)
+llm_call_seconds = register(
+    Histogram(
+        "llm_call_duration_seconds",
+        "Duration of streamed agent calls, including streaming to the client",
+        ("agent",),
+    )
+)
+llm_calls = register(
+    Counter("llm_calls_total", "Agent calls by outcome", ("agent", "outcome"))
+)
+llm_tokens = register(
+    Counter("llm_tokens_total", "Tokens used by agent calls", ("agent", "kind"))
+)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float):
+    http_request_seconds.observe(seconds, method, route)
+    http_requests.inc(1, method, route, status)
+
+
+class LLMCall:
+    """Times one agent call; set usage to the run's usage to count tokens"""
+
+    def __init__(self, agent: str):
+        self.agent = agent
+        self.usage = None
+        self.started: Optional[float] = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        llm_call_seconds.observe(time.perf_counter() - self.started, self.agent)
+        if exc_type is None:
+            outcome = "ok"
+        elif issubclass(exc_type, Exception):
+            outcome = "error"
+        else:
+            outcome = "cancelled"
+        llm_calls.inc(1, self.agent, outcome)
+        if self.usage is not None:
+            llm_tokens.inc(self.usage.input_tokens or 0, self.agent, "input")
+            llm_tokens.inc(self.usage.output_tokens or 0, self.agent, "output")
+        return False
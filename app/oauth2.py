@@ -1,24 +1,77 @@
+import secrets
+import threading
 from datetime import datetime, timedelta, timezone
-from fastapi import Cookie, Depends, HTTPException, status
+from typing import Optional
+from cachetools import TTLCache
+from fastapi import Cookie, Depends, Header, HTTPException, status
+from fastapi.requests import HTTPConnection
 from fastapi.security.oauth2 import OAuth2PasswordBearer
 import jwt
 from jwt.exceptions import InvalidTokenError
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app import utils
 from database import models, db_client
 import schema
-from config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from config import (
+    SECRET_KEY,
+    ALGORITHM,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    METRICS_TOKEN,
+    USER_CACHE_SIZE,
+    USER_CACHE_TTL_SECONDS,
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/users/auth")
 
+# Token subject -> UserOut, so authenticated requests skip the users lookup.
+# Mapper events below drop entries when a user row is updated or deleted.
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+user_cache_lock = threading.Lock()
+user_cache_stats = {"hits": 0, "misses": 0}
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(models.User).filter(
-        models.User.username == username).first()
+
+async def load_user(db: AsyncSession, user_id: Optional[int]):
+    if user_id is None:
+        return None
+    with user_cache_lock:
+        user = user_cache.get(user_id)
+        user_cache_stats["hits" if user else "misses"] += 1
+    if user:
+        return user
+
+    row = await db.get(models.User, user_id)
+    if row is None:
+        return None
+    user = schema.UserOut(id=row.id, username=row.username)
+    with user_cache_lock:
+        user_cache[user_id] = user
+    return user
+
+
+def invalidate_user(user_id: int):
+    with user_cache_lock:
+        user_cache.pop(user_id, None)
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def invalidate_cached_user(mapper, connection, target):
+    invalidate_user(target.id)
+
+
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await db.scalar(
+        select(models.User).filter(models.User.username == username)
+    )
     if not user:
         return False
-    if not utils.verify_password(password, user.password):
+    valid, new_hash = await utils.verify_and_update_password(password, user.password)
+    if not valid:
         return False
+    if new_hash:
+        user.password = new_hash
+        await db.commit()
     return user
 
 
@@ -42,7 +95,16 @@ def verify_auth_token(token: str, credentials_exception: HTTPException):
         raise credentials_exception
 
 
-def get_user(access_token: str = Cookie(None), db: Session = Depends(db_client.get_db)):
+def remember_user(connection: HTTPConnection, user: schema.UserOut):
+    # Lets db_client.get_read_db route this user's reads; see ReadRoutingSession
+    connection.state.user_id = user.id
+
+
+async def get_user(
+    connection: HTTPConnection,
+    access_token: str = Cookie(None),
+    db: AsyncSession = Depends(db_client.get_async_db),
+):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -51,17 +113,31 @@ def get_user(access_token: str = Cookie(None), db: Session = Depends(db_client.g
     try:
         access_token = str.replace(str(access_token), "Bearer ", "")
         token = verify_auth_token(access_token, credentials_exception)
-        user = db.query(models.User).filter(models.User.id == token.id).first()
-        print(user)
+        user = await load_user(db, token.id)
         if user is None:
-            return credentials_exception
+            raise credentials_exception
+        remember_user(connection, user)
         return user
     except HTTPException:
         return None
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(db_client.get_db)
+async def get_user_sessionless(
+    connection: HTTPConnection, access_token: str = Cookie(None)
+):
+    """get_user for long-lived connections such as the chat websocket.
+
+    The session is closed as soon as the user is loaded, so the connection
+    does not keep a pooled database connection checked out.
+    """
+    async with db_client.AsyncSessionLocal() as db:
+        return await get_user(connection, access_token, db)
+
+
+async def get_current_user(
+    connection: HTTPConnection,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(db_client.get_async_db),
 ):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -69,7 +145,26 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     token = verify_auth_token(token, credentials_exception)
-    user = db.query(models.User).filter(models.User.id == token.id).first()
+    user = await load_user(db, token.id)
     if user is None:
         raise credentials_exception
+    remember_user(connection, user)
     return user
+
+
+def require_metrics_token(authorization: Optional[str] = Header(None)):
+    """Guard for process-wide stats: a bearer METRICS_TOKEN.
+
+    Fails closed, so the stats stay private until a token is configured.
+    """
+    if not METRICS_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Set METRICS_TOKEN to enable process stats",
+        )
+    if not secrets.compare_digest(
+        (authorization or "").encode(), f"Bearer {METRICS_TOKEN}".encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token"
+        )
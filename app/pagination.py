@@ -0,0 +1,60 @@
+import base64
+from datetime import date
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import models
+
+PAGE_SIZE = 10
+API_PAGE_SIZE = 50
+MAX_API_PAGE_SIZE = 500
+
+
+def encode_cursor(transaction: models.Transactions) -> str:
+    """Opaque token pointing just past the given (date, id) position"""
+    raw = f"{transaction.date.isoformat()}|{transaction.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[date, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        cursor_date, cursor_id = raw.split("|")
+        return date.fromisoformat(cursor_date), int(cursor_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def page_query(query: Select, cursor: Optional[str], limit: int) -> Select:
+    """The query for one page past cursor, with one extra row to detect more"""
+    query = query.order_by(
+        models.Transactions.date.desc(), models.Transactions.id.desc()
+    )
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(models.Transactions.date, models.Transactions.id)
+            < tuple_(cursor_date, cursor_id)
+        )
+    return query.limit(limit + 1)
+
+
+async def fetch_transaction_page(
+    db: AsyncSession, query: Select, cursor: Optional[str], limit: int
+) -> tuple[list[models.Transactions], Optional[str]]:
+    """Run a transactions query one keyset page at a time, newest first.
+
+    Rows are ordered by (date, id) descending and the cursor is compared as a
+    row value, so every page is a bounded index range scan instead of an
+    OFFSET that grows with the page number. One extra row is fetched to know
+    whether a next page exists.
+    """
+    rows = (await db.scalars(page_query(query, cursor, limit))).all()
+    if len(rows) > limit:
+        return list(rows[:limit]), encode_cursor(rows[limit - 1])
+    return list(rows), None
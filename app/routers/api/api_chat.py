@@ -0,0 +1,16 @@
+from fastapi import Depends, status, APIRouter
+
+from app import oauth2
+from app.services import chat_connections
+
+router = APIRouter(prefix="/api/chat", tags=["api"])
+
+
+@router.get(
+    "/stats",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(oauth2.require_metrics_token)],
+)
+async def chat_stats():
+    """Process-wide chat load; guarded like /metrics, not per user"""
+    return chat_connections.manager.usage()
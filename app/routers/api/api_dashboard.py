@@ -0,0 +1,23 @@
+from datetime import date
+from typing import Optional
+
+import schema
+from fastapi import Depends, status, APIRouter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import oauth2
+from app.services import dashboard_analytics
+from database import db_client
+
+router = APIRouter(prefix="/api/dashboard", tags=["api"])
+
+
+@router.get("/", status_code=status.HTTP_200_OK)
+async def dashboard_data(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(db_client.get_read_db),
+    user: schema.UserOut = Depends(oauth2.get_current_user),
+):
+    """Monthly income/expense/net series and category totals for a range"""
+    return await dashboard_analytics.get_dashboard(db, user.id, start, end)
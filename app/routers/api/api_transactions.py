@@ -1,63 +1,219 @@
-from sqlalchemy import func, and_
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+import csv
+import io
+import json
+from datetime import date
+from typing import Any, Literal, Optional
 import schema
-from fastapi import Depends, status, APIRouter, HTTPException
-from app import oauth2
-from sqlalchemy.orm import Session, joinedload
-from database import models, db_client
+from fastapi import (
+    Body,
+    Depends,
+    File,
+    Query,
+    status,
+    APIRouter,
+    HTTPException,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
+from app import oauth2, pagination
+from app.services import category_catalog, statement_import
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from database import models, db_client, rollups
 
 router = APIRouter(prefix="/api/transactions", tags=["api"])
 
+MAX_BATCH_SIZE = 5000
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FIELDS = ["id", "date", "type", "amount", "category_id", "category", "comment"]
+
 
 @router.get("/")
-def api_transactions(
-    db: Session = Depends(db_client.get_db),
+async def api_transactions(
+    cursor: Optional[str] = None,
+    limit: int = Query(pagination.API_PAGE_SIZE, ge=1, le=pagination.MAX_API_PAGE_SIZE),
+    db: AsyncSession = Depends(db_client.get_read_db),
     user: schema.UserOut = Depends(oauth2.get_current_user),
 ):
-    transactions = (
-        db.query(models.Transactions)
+    transactions, next_cursor = await pagination.fetch_transaction_page(
+        db,
+        select(models.Transactions)
         .filter(models.Transactions.user_id == user.id)
-        .options(joinedload(models.Transactions.category))
-        .all()
+        .options(joinedload(models.Transactions.category)),
+        cursor,
+        limit,
     )
-    return transactions
+    return {"transactions": transactions, "next_cursor": next_cursor}
 
 
 @router.post(
     "/", status_code=status.HTTP_201_CREATED, response_model=schema.Transactions
 )
-def insert_api_transactions(
+async def insert_api_transactions(
     transaction: schema.CreateTransaction,
-    db: Session = Depends(db_client.get_db),
+    db: AsyncSession = Depends(db_client.get_async_db),
     user: schema.UserOut = Depends(oauth2.get_current_user),
 ):
     print(transaction.model_dump(), user.id)
     try:
         new_transaction = models.Transactions(
-            user_id=user.id, **transaction.model_dump()
+            **transaction.model_dump(exclude={"user_id"}), user_id=user.id
         )
     except Exception as e:
         print(e)
         return None
     db.add(new_transaction)
-    db.commit()
-    db.refresh(new_transaction)
+    await db.commit()
+    await db.refresh(new_transaction)
     return new_transaction
 
 
+@router.post("/batch", status_code=status.HTTP_201_CREATED)
+async def insert_api_transactions_batch(
+    transactions: list[Any] = Body(..., max_length=MAX_BATCH_SIZE),
+    db: AsyncSession = Depends(db_client.get_async_db),
+    user: schema.UserOut = Depends(oauth2.get_current_user),
+):
+    """Validate every item, then insert the valid ones in one statement.
+
+    Invalid items are reported by index instead of failing the whole batch.
+    Ids come back from a single INSERT .. RETURNING in input order.
+    """
+    categories = await category_catalog.catalog.get(db)
+    rows, indexes, errors = [], [], []
+    for index, item in enumerate(transactions):
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("Expected a transaction object")
+            transaction = schema.CreateTransaction.model_validate(
+                {**item, "user_id": user.id}
+            )
+            type = models.Type(transaction.type)
+            if transaction.category_id not in categories.by_id:
+                raise ValueError(f"Unknown category_id {transaction.category_id}")
+        except (ValidationError, ValueError) as e:
+            errors.append({"index": index, "error": str(e)})
+            continue
+        rows.append(
+            {
+                **transaction.model_dump(),
+                "type": type,
+                "amount": models.money(transaction.amount),
+            }
+        )
+        indexes.append(index)
+
+    created = []
+    if rows:
+        table = models.Transactions.__table__
+        ids = await db.scalars(
+            insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+        )
+        created = [{"index": i, "id": id} for i, id in zip(indexes, ids.all())]
+        deltas = rollups.deltas_for_rows(rows)
+        connection = await db.connection()
+        await connection.run_sync(
+            lambda sync_conn: rollups.apply_deltas(sync_conn, deltas)
+        )
+        await db.commit()
+    return {"inserted": len(created), "created": created, "errors": errors}
+
+
 @router.get("/total/{type}")
-def api_expense(
+async def api_expense(
     type: str,
-    db: Session = Depends(db_client.get_db),
+    month: Optional[date] = None,
+    db: AsyncSession = Depends(db_client.get_read_db),
     user: schema.UserOut = Depends(oauth2.get_current_user),
 ):
     if type not in models.Type._value2member_map_:
         return {"Error": "Expense or Income excepted in route"}
-    sub_total = (
-        db.query(func.sum(models.Transactions.amount))
-        .filter(
-            and_(models.Transactions.user_id == user.id),
-            models.Transactions.type == type,
+    sub_total = await db.scalar(rollups.total_query(user.id, models.Type(type), month))
+    return {type: sub_total}
+
+
+@router.post("/import")
+async def api_import(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ofx"]] = None,
+    db: AsyncSession = Depends(db_client.get_async_db),
+    user: schema.UserOut = Depends(oauth2.get_current_user),
+):
+    if format is None:
+        filename = (file.filename or "").lower()
+        format = "ofx" if filename.endswith((".ofx", ".qfx")) else "csv"
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return await statement_import.import_statement(db, user.id, stream, format)
+    finally:
+        stream.detach()
+
+
+async def export_rows(user_id: int, format: str):
+    """Yield the user's transactions as encoded chunks, one batch at a time.
+
+    Opens its own session, as the request-scoped one is closed before a
+    streaming body starts. Rows come from a server-side cursor in batches of
+    EXPORT_BATCH_SIZE, so memory stays flat however long the history is.
+    """
+    query = (
+        select(
+            models.Transactions.id,
+            models.Transactions.date,
+            models.Transactions.type,
+            models.Transactions.amount,
+            models.Transactions.category_id,
+            models.Category.name.label("category"),
+            models.Transactions.comment,
         )
-        .scalar()
+        .join(models.Category)
+        .filter(models.Transactions.user_id == user_id)
+        .order_by(models.Transactions.date.desc(), models.Transactions.id.desc())
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if format == "csv":
+        writer.writerow(EXPORT_FIELDS)
+
+    async with db_client.read_session(user_id) as db:
+        result = await db.stream(query)
+        async for batch in result.partitions():
+            for row in batch:
+                values = [
+                    row.id,
+                    row.date.isoformat(),
+                    row.type.value,
+                    str(row.amount),
+                    row.category_id,
+                    row.category,
+                    row.comment,
+                ]
+                if format == "csv":
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, values))))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@router.get("/export")
+async def api_export(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    user: schema.UserOut = Depends(oauth2.get_current_user),
+):
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_rows(user.id, format),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="transactions.{format}"'
+        },
     )
-    return {type: sub_total}
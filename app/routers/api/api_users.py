@@ -2,7 +2,7 @@ import schema
 from fastapi import Depends, status, APIRouter, HTTPException
 from fastapi.security.oauth2 import OAuth2PasswordRequestForm
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import models, db_client
 from app import oauth2, utils
 
@@ -12,25 +12,27 @@ router = APIRouter(prefix="/api/users", tags=["api"])
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=schema.UserOut)
-def create_user(user: schema.UserCreate, db: Session = Depends(db_client.get_db)):
-    user.password = utils.get_password_hash(user.password)
+async def create_user(
+    user: schema.UserCreate, db: AsyncSession = Depends(db_client.get_async_db)
+):
+    user.password = await utils.hash_password(user.password)
     new_user = models.User(**user.model_dump())
     db.add(new_user)
-    db.commit()
+    await db.commit()
     return new_user
 
 
 @router.get("/me", status_code=status.HTTP_200_OK, response_model=schema.UserOut)
-def get_user(user: schema.UserOut = Depends(oauth2.get_current_user)):
+async def get_user(user: schema.UserOut = Depends(oauth2.get_current_user)):
     return user
 
 
 @router.post("/auth")
-def auth(
+async def auth(
     user_cred: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(db_client.get_db),
+    db: AsyncSession = Depends(db_client.get_async_db),
 ):
-    user = oauth2.authenticate_user(db, user_cred.username, user_cred.password)
+    user = await oauth2.authenticate_user(db, user_cred.username, user_cred.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
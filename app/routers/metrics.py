@@ -0,0 +1,119 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app import metrics, oauth2
+from app.services import (
+    chat_connections,
+    dashboard_analytics,
+    summary_cache,
+    transaction_rules,
+)
+from database import db_client
+
+router = APIRouter(tags=["metrics"])
+
+
+def engines():
+    yield "sync", db_client.engine
+    yield "async", db_client.async_engine
+    if db_client.read_async_engine is not None:
+        yield "replica", db_client.read_async_engine
+
+
+def pool_values(key: str):
+    # QueuePool reports overflow as negative until the pool has filled
+    def collect():
+        return {
+            (name,): max(0, usage[key])
+            for name, bind in engines()
+            if key in (usage := db_client.pool_usage(bind))
+        }
+
+    return collect
+
+
+for key, name, help in (
+    ("checkedout", "db_pool_checked_out", "Connections currently checked out"),
+    ("overflow", "db_pool_overflow", "Connections opened beyond pool_size"),
+    ("size", "db_pool_size", "Configured pool size"),
+):
+    metrics.register(metrics.Collected(name, help, ("engine",), pool_values(key)))
+
+metrics.register(
+    metrics.Collected(
+        "chat_websocket_connections",
+        "Open /ws chat connections",
+        (),
+        lambda: {(): len(chat_connections.manager.connections)},
+    )
+)
+metrics.register(
+    metrics.Collected(
+        "chat_messages_in_flight",
+        "Chat messages being answered",
+        (),
+        lambda: {(): chat_connections.manager.stats["in_flight"]},
+    )
+)
+metrics.register(
+    metrics.Collected(
+        "chat_messages_total",
+        "Chat messages by outcome",
+        ("outcome",),
+        lambda: {
+            (outcome,): chat_connections.manager.stats[outcome]
+            for outcome in ("processed", "cancelled", "rejected")
+        },
+        type="counter",
+    )
+)
+metrics.register(
+    metrics.Collected(
+        "chat_fast_path_total",
+        "Messages parsed locally (hits) or sent to the agent (misses)",
+        ("result",),
+        lambda: {(key,): value for key, value in transaction_rules.stats.items()},
+        type="counter",
+    )
+)
+metrics.register(
+    metrics.Collected(
+        "chat_summary_cache_total",
+        "Summary cache lookups",
+        ("result",),
+        lambda: {
+            (key,): value for key, value in summary_cache.summary_cache_stats.items()
+        },
+        type="counter",
+    )
+)
+metrics.register(
+    metrics.Collected(
+        "dashboard_cache_total",
+        "Dashboard analytics cache lookups",
+        ("result",),
+        lambda: {
+            (key,): value
+            for key, value in dashboard_analytics.dashboard_cache_stats.items()
+        },
+        type="counter",
+    )
+)
+metrics.register(
+    metrics.Collected(
+        "user_cache_total",
+        "Authenticated user cache lookups",
+        ("result",),
+        lambda: {(key,): value for key, value in oauth2.user_cache_stats.items()},
+        type="counter",
+    )
+)
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(oauth2.require_metrics_token)],
+)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
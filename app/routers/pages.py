@@ -10,18 +10,21 @@ from fastapi import (
 )
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse, RedirectResponse
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import and_, select
 from decimal import Decimal
 from datetime import date
 from typing import Annotated, Optional
-import json
+from uuid import uuid4
+import asyncio
 
 from database import models, db_client
 from database.models import Type
 import schema
-from app import utils, oauth2
-from app.services.pydantic_ai_chat_service import process_message
+from app import utils, oauth2, pagination
+from app.services import category_catalog, chat_connections, dashboard_analytics
+from app.services.pydantic_ai_chat_service import stream_message
 
 
 router = APIRouter(tags=["pages"])
@@ -51,12 +54,12 @@ def login(request: Request):
 
 
 @router.post("/check_username", response_class=HTMLResponse)
-def check_username(
+async def check_username(
     request: Request,
     username: Annotated[str, Form()],
-    db: Session = Depends(db_client.get_db),
+    db: AsyncSession = Depends(db_client.get_async_db),
 ):
-    if db.query(models.User).filter(models.User.username == username).first():
+    if await db.scalar(select(models.User).filter(models.User.username == username)):
         return HTMLResponse(
             "<div id='username_result' style='color: green;'>Username already exists</div>"
         )
@@ -67,11 +70,11 @@ def check_username(
 
 
 @router.post("/get_category", response_class=HTMLResponse)
-def get_category(
+async def get_category(
     request: Request,
     in_or_exp: Annotated[str, Form()],
     current_category_id: Annotated[Optional[int], Form()] = None,
-    db: Session = Depends(db_client.get_db),
+    db: AsyncSession = Depends(db_client.get_async_db),
     user: schema.UserOut = Depends(oauth2.get_user),
 ):
     if user is None:
@@ -79,9 +82,7 @@ def get_category(
             "login.html",
             {"request": request, "message": "Session Expired, Please Login again"},
         )
-    categories = (
-        db.query(models.Category).filter(models.Category.type == in_or_exp).all()
-    )
+    categories = (await category_catalog.catalog.get(db)).for_type(in_or_exp)
 
     current_category_exists = (
         any(cat.id == current_category_id for cat in categories)
@@ -117,18 +118,18 @@ def password_check(
 
 
 @router.post("/signup")
-def signup_post(
+async def signup_post(
     request: Request,
     username: Annotated[str, Form()],
     password: Annotated[str, Form()],
     confirmPassword: Annotated[str, Form()],
-    db: Session = Depends(db_client.get_db),
+    db: AsyncSession = Depends(db_client.get_async_db),
 ):
     user = schema.UserCreate(username=username, password=password)
-    user.password = utils.get_password_hash(user.password)
+    user.password = await utils.hash_password(user.password)
     new_user = models.User(**user.model_dump())
     db.add(new_user)
-    db.commit()
+    await db.commit()
     return templates.TemplateResponse(
         "home.html",
         {"request": request},
@@ -136,14 +137,14 @@ def signup_post(
 
 
 @router.post("/login")
-def login_post(
+async def login_post(
     request: Request,
     response: Response,
     username: Annotated[str, Form()],
     password: Annotated[str, Form()],
-    db: Session = Depends(db_client.get_db),
+    db: AsyncSession = Depends(db_client.get_async_db),
 ):
-    user = oauth2.authenticate_user(db, username, password)
+    user = await oauth2.authenticate_user(db, username, password)
     if not user:
         return templates.TemplateResponse(
             "login.html",
@@ -159,7 +160,7 @@ def login_post(
 
 
 @router.get("/dashboard")
-def dashboard(request: Request, user: schema.UserOut = Depends(oauth2.get_user)):
+async def dashboard(request: Request, user: schema.UserOut = Depends(oauth2.get_user)):
     if user is None:
         return templates.TemplateResponse(
             "login.html",
@@ -171,6 +172,21 @@ def dashboard(request: Request, user: schema.UserOut = Depends(oauth2.get_user))
     )
 
 
+@router.get("/dashboard/data")
+async def dashboard_data(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(db_client.get_read_db),
+    user: schema.UserOut = Depends(oauth2.get_user),
+):
+    """Chart data for the dashboard; the cookie-authenticated /api/dashboard"""
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Session expired"
+        )
+    return await dashboard_analytics.get_dashboard(db, user.id, start, end)
+
+
 @router.get("/logout")
 def logout(response: Response):
     response = RedirectResponse(url="/", status_code=status.HTTP_303_SEE_OTHER)
@@ -178,10 +194,21 @@ def logout(response: Response):
     return response
 
 
+def user_transactions_query(user_id: int, type: str = "Any"):
+    query = (
+        select(models.Transactions)
+        .filter(models.Transactions.user_id == user_id)
+        .options(joinedload(models.Transactions.category))
+    )
+    if type != "Any":
+        query = query.filter(models.Transactions.type == type)
+    return query
+
+
 @router.get("/transactions")
-def transactions(
+async def transactions(
     request: Request,
-    db: Session = Depends(db_client.get_db),
+    db: AsyncSession = Depends(db_client.get_read_db),
     user: schema.UserOut = Depends(oauth2.get_user),
 ):
     if user is None:
@@ -189,24 +216,53 @@ def transactions(
             "login.html",
             {"request": request, "message": "Session Expired, Please Login again"},
         )
-    transactions = (
-        db.query(models.Transactions)
-        .filter(models.Transactions.user_id == user.id)
-        .options(joinedload(models.Transactions.category))
-        .order_by(models.Transactions.date.desc())
-        .limit(10)
-        .all()
+    transactions, next_cursor = await pagination.fetch_transaction_page(
+        db, user_transactions_query(user.id), None, pagination.PAGE_SIZE
     )
     return templates.TemplateResponse(
         "transactions.html",
-        {"request": request, "user": user, "transactions": transactions},
+        {
+            "request": request,
+            "user": user,
+            "transactions": transactions,
+            "next_cursor": next_cursor,
+            "type": "Any",
+        },
+    )
+
+
+@router.get("/transactions/page", response_class=HTMLResponse)
+async def transactions_page(
+    request: Request,
+    cursor: str,
+    type: str = "Any",
+    db: AsyncSession = Depends(db_client.get_read_db),
+    user: schema.UserOut = Depends(oauth2.get_user),
+):
+    if user is None:
+        return templates.TemplateResponse(
+            "login.html",
+            {"request": request, "message": "Session Expired, Please Login again"},
+        )
+    transactions, next_cursor = await pagination.fetch_transaction_page(
+        db, user_transactions_query(user.id, type), cursor, pagination.PAGE_SIZE
+    )
+    return templates.TemplateResponse(
+        "transaction-rows.html",
+        {
+            "request": request,
+            "user": user,
+            "transactions": transactions,
+            "next_cursor": next_cursor,
+            "type": type,
+        },
     )
 
 
 @router.get("/transactions/insert")
-def transactions_insert(
+async def transactions_insert(
     request: Request,
-    db: Session = Depends(db_client.get_db),
+    db: AsyncSession = Depends(db_client.get_async_db),
     user: schema.UserOut = Depends(oauth2.get_user),
 ):
     if user is None:
@@ -218,10 +274,10 @@ def transactions_insert(
 
 
 @router.post("/transactions/filter")
-def filter_transactions(
+async def filter_transactions(
     request: Request,
     type: Annotated[str, Form()],
-    db: Session = Depends(db_client.get_db),
+    db: AsyncSession = Depends(db_client.get_read_db),
     user: schema.UserOut = Depends(oauth2.get_user),
 ):
     if user is None:
@@ -229,39 +285,30 @@ def filter_transactions(
             "login.html",
             {"request": request, "message": "Session Expired, Please Login again"},
         )
-    if type == "Any":
-        transactions = (
-            db.query(models.Transactions)
-            .filter(models.Transactions.user_id == user.id)
-            .options(joinedload(models.Transactions.category))
-            .limit(10)
-            .all()
-        )
-    else:
-        transactions = (
-            db.query(models.Transactions)
-            .filter(
-                and_(models.Transactions.user_id == user.id),
-                models.Transactions.type == type,
-            )
-            .options(joinedload(models.Transactions.category))
-            .all()
-        )
+    transactions, next_cursor = await pagination.fetch_transaction_page(
+        db, user_transactions_query(user.id, type), None, pagination.PAGE_SIZE
+    )
     return templates.TemplateResponse(
         "table-contents.html",
-        {"request": request, "user": user, "transactions": transactions},
+        {
+            "request": request,
+            "user": user,
+            "transactions": transactions,
+            "next_cursor": next_cursor,
+            "type": type,
+        },
     )
 
 
 @router.post("/transactions/insert")
-def insert_transaction(
+async def insert_transaction(
     request: Request,
     date: Annotated[date, Form()],
     in_or_exp: Annotated[str, Form()],
     amount: Annotated[float, Form()],
     category: Annotated[int, Form()],
     comments: Annotated[Optional[str], Form()] = None,
-    db: Session = Depends(db_client.get_db),
+    db: AsyncSession = Depends(db_client.get_async_db),
     user: schema.UserOut = Depends(oauth2.get_user),
 ):
     if user is None:
@@ -280,7 +327,7 @@ def insert_transaction(
         )
         new_trans = models.Transactions(**trans.model_dump())
         db.add(new_trans)
-        db.commit()
+        await db.commit()
 
         return templates.TemplateResponse(
             "form.html", {"request": request, "user": user}
@@ -291,10 +338,10 @@ def insert_transaction(
 
 
 @router.get("/transactions/{id}", response_class=HTMLResponse)
-def get_transaction(
+async def get_transaction(
     request: Request,
     user: schema.UserOut = Depends(oauth2.get_user),
-    db: Session = Depends(db_client.get_db),
+    db: AsyncSession = Depends(db_client.get_async_db),
     id: int = 0,
 ):
     if user is None:
@@ -302,13 +349,13 @@ def get_transaction(
             "login.html",
             {"request": request, "message": "Session Expired, Please Login again"},
         )
-    transaction = (
-        db.query(models.Transactions)
+    transaction = await db.scalar(
+        select(models.Transactions)
         .filter(
             and_(models.Transactions.user_id == user.id),
             models.Transactions.id == id,
         )
-        .first()
+        .options(joinedload(models.Transactions.category))
     )
     if transaction is None:
         raise HTTPException(status_code=404, detail="Transaction not found")
@@ -319,14 +366,14 @@ def get_transaction(
 
 
 @router.post("/transactions/{transaction_id}", response_class=HTMLResponse)
-def update_transaction(
+async def update_transaction(
     request: Request,
     transaction_id: int,
     date: Annotated[date, Form()],
     in_or_exp: Annotated[str, Form()],
     amount: Annotated[float, Form()],
     category: Annotated[Optional[int], Form()] = None,
-    db: Session = Depends(db_client.get_db),
+    db: AsyncSession = Depends(db_client.get_async_db),
     user: schema.UserOut = Depends(oauth2.get_user),
 ):
     if user is None:
@@ -335,7 +382,7 @@ def update_transaction(
             {"request": request, "message": "Session Expired, Please Login again"},
         )
 
-    transaction = db.get(models.Transactions, transaction_id)
+    transaction = await db.get(models.Transactions, transaction_id)
     if transaction is None:
         raise HTTPException(status_code=404, detail="Transaction not found")
 
@@ -347,7 +394,8 @@ def update_transaction(
     transaction.amount = Decimal(str(amount))
     transaction.category_id = category
 
-    db.commit()
+    await db.commit()
+    await db.refresh(transaction, ["category"])
 
     return templates.TemplateResponse(
         "transaction.html",
@@ -356,47 +404,47 @@ def update_transaction(
 
 
 @router.delete("/transactions/{transaction_id}")
-def delete_transaction(
+async def delete_transaction(
     request: Request,
     transaction_id: int,
     user: schema.UserOut = Depends(oauth2.get_user),
-    db: Session = Depends(db_client.get_db),
+    db: AsyncSession = Depends(db_client.get_async_db),
 ):
     if user is None:
         return templates.TemplateResponse(
             "login.html",
             {"request": request, "message": "Session Expired, Please Login again"},
         )
-    transaction = db.get(models.Transactions, transaction_id)
+    transaction = await db.get(models.Transactions, transaction_id)
     if transaction is None:
         raise HTTPException(status_code=404, detail="Transaction not found")
 
     if transaction.user_id != user.id:
         raise HTTPException(status_code=403, detail="Access denied")
-    db.delete(transaction)
-    db.commit()
+    await db.delete(transaction)
+    await db.commit()
     return Response(status_code=200)
 
 
 @router.get("/transactions/{transaction_id}/edit", response_class=HTMLResponse)
-def edit_transaction(
+async def edit_transaction(
     request: Request,
     transaction_id: int,
     user: schema.UserOut = Depends(oauth2.get_user),
-    db: Session = Depends(db_client.get_db),
+    db: AsyncSession = Depends(db_client.get_async_db),
 ):
     if user is None:
         return templates.TemplateResponse(
             "login.html",
             {"request": request, "message": "Session Expired, Please Login again"},
         )
-    transaction = (
-        db.query(models.Transactions)
+    transaction = await db.scalar(
+        select(models.Transactions)
         .filter(
             and_(models.Transactions.user_id == user.id),
             models.Transactions.id == transaction_id,
         )
-        .first()
+        .options(joinedload(models.Transactions.category))
     )
     if transaction is None:
         raise HTTPException(status_code=404, detail="Transaction not found")
@@ -407,7 +455,7 @@ def edit_transaction(
 
 
 @router.get("/chat", response_class=HTMLResponse)
-def get_chat(request: Request, user: schema.UserOut = Depends(oauth2.get_user)):
+async def get_chat(request: Request, user: schema.UserOut = Depends(oauth2.get_user)):
     if user is None:
         return templates.TemplateResponse(
             "login.html",
@@ -419,33 +467,63 @@ def get_chat(request: Request, user: schema.UserOut = Depends(oauth2.get_user)):
     )
 
 
+async def send_chat_notice(websocket: WebSocket, text: str):
+    notice_html = templates.get_template("chat_partial.html").render(
+        {"message_text": text, "is_system": True}
+    )
+    await websocket.send_text(notice_html)
+
+
+async def answer_chat_message(
+    websocket: WebSocket, db: AsyncSession, user: schema.UserOut, user_msg: str
+):
+    user_html = templates.env.get_template("chat_partial.html").render(
+        {"message_text": user_msg, "is_system": False}
+    )
+    await websocket.send_text(user_html)
+
+    # Open an empty reply bubble, then replace it out-of-band as the
+    # reply grows so the first words show up while the model runs.
+    message_id = f"reply-{uuid4().hex}"
+    placeholder_html = templates.get_template("chat_partial.html").render(
+        {"message_text": "…", "is_system": True, "message_id": message_id}
+    )
+    await websocket.send_text(placeholder_html)
+
+    update = templates.get_template("chat_stream_update.html")
+    reply = ""
+    try:
+        async for reply in stream_message(user_msg, user.id, db):
+            await websocket.send_text(
+                update.render({"message_text": reply, "message_id": message_id})
+            )
+        # Marks the reply as finished for clients that wait for it
+        await websocket.send_text(
+            update.render(
+                {"message_text": reply, "message_id": message_id, "complete": True}
+            )
+        )
+    except asyncio.CancelledError:
+        await websocket.send_text(
+            update.render(
+                {"message_text": f"{reply}\n\n*Stopped.*", "message_id": message_id}
+            )
+        )
+        raise
+
+
 @router.websocket("/ws")
 async def websocket_connection(
     websocket: WebSocket,
-    user: schema.UserOut = Depends(oauth2.get_user),
-    db: Session = Depends(db_client.get_db),
+    user: schema.UserOut = Depends(oauth2.get_user_sessionless),
 ):
     await websocket.accept()
-    while True:
-        try:
-            data = await websocket.receive_text()
-            parsed = json.loads(data)
-            user_msg = parsed.get("message", "").strip()
-            user_html = templates.env.get_template("chat_partial.html").render(
-                {"message_text": user_msg, "is_system": False}
-            )
-            await websocket.send_text(user_html)
-
-            system_response = await process_message(user_msg, user.id, db)
-            response_html = templates.get_template("chat_partial.html").render(
-                {"message_text": system_response, "is_system": True}
-            )
-            await websocket.send_text(response_html)
-
-        except Exception as e:
-            print(e)
-            await websocket.close()
-            break
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await chat_connections.manager.serve(
+        websocket, user, answer_chat_message, send_chat_notice
+    )
 
 
 @router.get("/api")
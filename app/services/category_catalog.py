@@ -0,0 +1,72 @@
+import asyncio
+from typing import NamedTuple, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import Category, Type
+
+
+class CategoryEntry(NamedTuple):
+    id: int
+    name: str
+    type: Type
+
+
+class CategorySnapshot:
+    """Immutable view of the category table at one catalog version"""
+
+    def __init__(self, categories: list[CategoryEntry], version: int):
+        self.version = version
+        self.by_id = {cat.id: cat for cat in categories}
+        self.by_type = {type: [] for type in Type}
+        self.by_folded_name = {}
+        for cat in categories:
+            self.by_type[cat.type].append(cat)
+            self.by_folded_name[(cat.name.casefold(), cat.type)] = cat
+
+    def for_type(self, type: str) -> list[CategoryEntry]:
+        type_enum = Type._value2member_map_.get(type)
+        return self.by_type[type_enum] if type_enum else []
+
+    def find(self, name: str, type: Type) -> Optional[CategoryEntry]:
+        """Case-insensitive lookup, matching the old lower(name) query"""
+        return self.by_folded_name.get((name.casefold(), type))
+
+    def names_by_type(self) -> dict[str, list[str]]:
+        return {
+            type.name: [cat.name for cat in cats]
+            for type, cats in self.by_type.items()
+            if cats
+        }
+
+
+class CategoryCatalog:
+    """Process-wide cache of the category table.
+
+    Categories are small and rarely change, so they are read once and served
+    from memory. invalidate() bumps the version after a category is created;
+    the next get() reloads, and downstream caches can key off the version.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.snapshot: Optional[CategorySnapshot] = None
+        self.lock = asyncio.Lock()
+
+    def invalidate(self):
+        self.version += 1
+
+    async def get(self, db: AsyncSession) -> CategorySnapshot:
+        if self.snapshot is None or self.snapshot.version != self.version:
+            async with self.lock:
+                version = self.version
+                if self.snapshot is None or self.snapshot.version != version:
+                    rows = await db.scalars(select(Category).order_by(Category.id))
+                    self.snapshot = CategorySnapshot(
+                        [CategoryEntry(cat.id, cat.name, cat.type) for cat in rows],
+                        version,
+                    )
+        return self.snapshot
+
+
+catalog = CategoryCatalog()
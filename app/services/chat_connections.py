@@ -0,0 +1,150 @@
+"""
+Chat websocket connections.
+
+Every socket gets a ChatConnection: a receive loop that queues incoming
+messages and a single worker that answers them in order. The worker opens
+a database session per message and closes it once the reply is sent, so
+idle chat tabs hold no pooled connection however many are open.
+
+The queue is bounded by CHAT_QUEUE_SIZE; messages arriving while it is
+full are refused with a notice instead of piling up. A {"action": "cancel"}
+payload, or a message sent with "supersede", cancels the reply in flight.
+"""
+
+import asyncio
+import json
+from typing import Awaitable, Callable, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import schema
+from config import CHAT_QUEUE_SIZE
+from app.services import summary_cache, transaction_rules
+from database import db_client
+
+MessageHandler = Callable[[WebSocket, AsyncSession, schema.UserOut, str], Awaitable]
+NoticeHandler = Callable[[WebSocket, str], Awaitable]
+
+
+class ChatConnection:
+    def __init__(
+        self,
+        manager: "ChatConnectionManager",
+        websocket: WebSocket,
+        user: schema.UserOut,
+        handle: MessageHandler,
+        notify: NoticeHandler,
+    ):
+        self.manager = manager
+        self.websocket = websocket
+        self.user = user
+        self.handle = handle
+        self.notify = notify
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=CHAT_QUEUE_SIZE)
+        self.current: Optional[asyncio.Task] = None
+
+    def cancel_current(self) -> bool:
+        if self.current and not self.current.done():
+            self.current.cancel()
+            return True
+        return False
+
+    async def receive(self):
+        while True:
+            text = await self.websocket.receive_text()
+            try:
+                payload = json.loads(text)
+                cancel = payload.get("action") == "cancel" or payload.get("supersede")
+                message = payload.get("message", "").strip()
+            except (ValueError, AttributeError):
+                # Not JSON, not an object, or a message that is not text
+                await self.notify(
+                    self.websocket, "Sorry, I couldn't read that message."
+                )
+                continue
+            if cancel and self.cancel_current():
+                self.manager.stats["cancelled"] += 1
+            if not message:
+                continue
+            try:
+                self.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self.manager.stats["rejected"] += 1
+                await self.notify(
+                    self.websocket,
+                    "I'm still working on your earlier messages. "
+                    "Please wait for a reply before sending more.",
+                )
+
+    async def work(self):
+        while True:
+            message = await self.queue.get()
+            self.current = asyncio.create_task(self.answer(message))
+            # wait() rather than await, so cancelling the reply does not
+            # cancel the worker along with it.
+            await asyncio.wait([self.current])
+            if not self.current.cancelled() and self.current.exception():
+                print(f"Chat message failed: {self.current.exception()}")
+            self.current = None
+
+    async def answer(self, message: str):
+        self.manager.stats["in_flight"] += 1
+        try:
+            async with db_client.AsyncSessionLocal() as db:
+                await self.handle(self.websocket, db, self.user, message)
+            self.manager.stats["processed"] += 1
+        finally:
+            self.manager.stats["in_flight"] -= 1
+
+    async def run(self):
+        worker = asyncio.create_task(self.work())
+        try:
+            await self.receive()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self.cancel_current()
+            worker.cancel()
+
+
+class ChatConnectionManager:
+    """Tracks open chat sockets and reports their load on the pool"""
+
+    def __init__(self):
+        self.connections: set[ChatConnection] = set()
+        self.stats = {"processed": 0, "cancelled": 0, "rejected": 0, "in_flight": 0}
+
+    async def serve(
+        self,
+        websocket: WebSocket,
+        user: schema.UserOut,
+        handle: MessageHandler,
+        notify: NoticeHandler,
+    ):
+        connection = ChatConnection(self, websocket, user, handle, notify)
+        self.connections.add(connection)
+        try:
+            await connection.run()
+        finally:
+            self.connections.discard(connection)
+
+    def usage(self) -> dict:
+        return {
+            "connections": len(self.connections),
+            "queued": sum(c.queue.qsize() for c in self.connections),
+            **self.stats,
+            "fast_path": {
+                **transaction_rules.stats,
+                "hit_rate": round(transaction_rules.hit_rate(), 3),
+            },
+            "summary_cache": {
+                **summary_cache.summary_cache_stats,
+                "size": len(summary_cache.summary_cache),
+                "hit_ratio": round(summary_cache.hit_ratio(), 3),
+            },
+            "db_pool": db_client.pool_usage(),
+        }
+
+
+manager = ChatConnectionManager()
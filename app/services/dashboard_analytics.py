@@ -0,0 +1,150 @@
+"""
+Monthly series and category breakdowns for the dashboard.
+
+One query groups the user's transactions in the range by month (truncated
+in SQL), type and category; the monthly income/expense/net series and the
+per-category totals are both folded from its rows. The result is compact
+JSON for the charts and is cached per user, range and data version, so
+reloading the dashboard does not touch the database until the user's
+transactions change.
+"""
+
+import threading
+from collections import defaultdict
+from datetime import date
+from typing import Optional
+
+from cachetools import LRUCache
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import DASHBOARD_CACHE_SIZE
+from database import data_versions
+from database.models import Category, Transactions, Type
+from database.rollups import month_start, month_start_sql, to_date
+
+DEFAULT_MONTHS = 12
+MAX_MONTHS = 60
+
+dashboard_cache = LRUCache(maxsize=DASHBOARD_CACHE_SIZE)
+dashboard_cache_lock = threading.Lock()
+dashboard_cache_stats = {"hits": 0, "misses": 0}
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def date_range(start: Optional[date], end: Optional[date]) -> tuple[date, date]:
+    """Fill in defaults and reject ranges that are reversed or too long"""
+    end = end or date.today()
+    start = start or add_months(month_start(end), 1 - DEFAULT_MONTHS)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end",
+        )
+    if add_months(month_start(start), MAX_MONTHS) <= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range is limited to {MAX_MONTHS} months",
+        )
+    return start, end
+
+
+def amount(value) -> float:
+    return round(float(value or 0), 2)
+
+
+def dashboard_query(dialect_name: str, user_id: int, start: date, end: date):
+    """Totals and counts per month, type and category in one GROUP BY"""
+    month = month_start_sql(Transactions.date, dialect_name).label("month")
+    return (
+        select(
+            month,
+            Transactions.type,
+            Category.name,
+            func.sum(Transactions.amount),
+            func.count(),
+        )
+        .join(Category)
+        .filter(
+            Transactions.user_id == user_id,
+            Transactions.date >= start,
+            Transactions.date <= end,
+        )
+        .group_by(month, Transactions.type, Category.name)
+    )
+
+
+async def build_dashboard(
+    db: AsyncSession, user_id: int, start: date, end: date
+) -> dict:
+    dialect_name = db.get_bind().dialect.name
+    rows = await db.execute(dashboard_query(dialect_name, user_id, start, end))
+
+    months = []
+    current = month_start(start)
+    while current <= end:
+        months.append(current)
+        current = add_months(current, 1)
+    position = {value: index for index, value in enumerate(months)}
+    series = {type: [0.0] * len(months) for type in Type}
+    categories = {type: defaultdict(lambda: [0.0, 0]) for type in Type}
+    for row_month, type, name, total, count in rows:
+        series[type][position[to_date(row_month)]] += float(total or 0)
+        categories[type][name][0] += float(total or 0)
+        categories[type][name][1] += count
+
+    income = [amount(value) for value in series[Type.Income]]
+    expense = [amount(value) for value in series[Type.Expense]]
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "months": [value.strftime("%Y-%m") for value in months],
+        "income": income,
+        "expense": expense,
+        "net": [amount(i - e) for i, e in zip(income, expense)],
+        "totals": {
+            "income": amount(sum(income)),
+            "expense": amount(sum(expense)),
+            "net": amount(sum(income) - sum(expense)),
+        },
+        "categories": {
+            type.value: [
+                {"name": name, "total": amount(total), "count": count}
+                for name, (total, count) in sorted(
+                    categories[type].items(), key=lambda item: -item[1][0]
+                )
+            ]
+            for type in Type
+        },
+    }
+
+
+async def get_dashboard(
+    db: AsyncSession,
+    user_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> dict:
+    """build_dashboard, served from the cache while the data version holds"""
+    start, end = date_range(start, end)
+    # Read the version before querying; see summary_cache.summary_key
+    key = (user_id, start, end, data_versions.get(user_id))
+    with dashboard_cache_lock:
+        cached = dashboard_cache.get(key)
+        dashboard_cache_stats["hits" if cached else "misses"] += 1
+    if cached:
+        return cached
+    dashboard = await build_dashboard(db, user_id, start, end)
+    with dashboard_cache_lock:
+        dashboard_cache[key] = dashboard
+    return dashboard
+
+
+def hit_ratio() -> float:
+    total = dashboard_cache_stats["hits"] + dashboard_cache_stats["misses"]
+    return dashboard_cache_stats["hits"] / total if total else 0.0
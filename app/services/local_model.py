@@ -0,0 +1,116 @@
+"""
+Deterministic stand-in for the Gemini model.
+
+Selected with LLM_BACKEND=local. It needs no network or API key, replies
+after LOCAL_LLM_LATENCY_MS and streams in LOCAL_LLM_CHUNKS pieces, so the
+chat pipeline can be exercised and load-tested offline.
+
+The output is picked from the message: summary questions get a
+SummaryRequest, messages with a number a TransactionData, anything else a
+ConversationalResponse, each with the arguments in SCRIPT. Agents with
+text output (the summary agent) get SCRIPT["summary"]. A JSON file named by
+LOCAL_LLM_SCRIPT overrides any of these entries.
+"""
+
+import asyncio
+import json
+import re
+from typing import AsyncIterator
+
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelResponse,
+    TextPart,
+    ToolCallPart,
+    UserPromptPart,
+)
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, FunctionModel
+
+from config import LOCAL_LLM_CHUNKS, LOCAL_LLM_LATENCY_MS, LOCAL_LLM_SCRIPT
+
+SCRIPT = {
+    "TransactionData": {
+        "amount": 100.0,
+        "category": "Miscellaneous",
+        "description": "local model transaction",
+        "transaction_type": "Expense",
+    },
+    "SummaryRequest": {"period_days": 30},
+    "ConversationalResponse": {
+        "response": "Hello! I can log your transactions and summarise your "
+        "spending. Tell me what you spent or earned, or ask for a summary."
+    },
+    "summary": "**Key Figures**\n\nThis is a summary from the local model. "
+    "It stands in for the real summary agent when testing offline.",
+}
+SUMMARY_PATTERN = re.compile(
+    r"\b(how much|summary|summari[sz]e|report|total|breakdown)\b", re.IGNORECASE
+)
+
+
+def load_script() -> dict:
+    script = dict(SCRIPT)
+    if LOCAL_LLM_SCRIPT:
+        with open(LOCAL_LLM_SCRIPT) as f:
+            script.update(json.load(f))
+    return script
+
+
+def last_prompt(messages: list[ModelMessage]) -> str:
+    for message in reversed(messages):
+        for part in getattr(message, "parts", []):
+            if isinstance(part, UserPromptPart) and isinstance(part.content, str):
+                return part.content
+    return ""
+
+
+def choose_output(script: dict, messages: list[ModelMessage], info: AgentInfo):
+    """(tool name, arguments) for structured agents, (None, text) otherwise"""
+    if not info.output_tools:
+        return None, script["summary"]
+    prompt = last_prompt(messages)
+    if SUMMARY_PATTERN.search(prompt):
+        wanted = "SummaryRequest"
+    elif re.search(r"\d", prompt):
+        wanted = "TransactionData"
+    else:
+        wanted = "ConversationalResponse"
+    tool = next(
+        (tool for tool in info.output_tools if tool.name.endswith(wanted)),
+        info.output_tools[0],
+    )
+    return tool.name, json.dumps(script[wanted])
+
+
+def chunks(text: str, count: int = LOCAL_LLM_CHUNKS) -> list[str]:
+    size = max(1, -(-len(text) // max(1, count)))
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def create_local_model(
+    latency_ms: int = LOCAL_LLM_LATENCY_MS, chunk_count: int = LOCAL_LLM_CHUNKS
+) -> FunctionModel:
+    script = load_script()
+    delay = latency_ms / 1000
+
+    async def respond(messages: list[ModelMessage], info: AgentInfo):
+        await asyncio.sleep(delay)
+        tool_name, content = choose_output(script, messages, info)
+        if tool_name is None:
+            return ModelResponse(parts=[TextPart(content)])
+        return ModelResponse(parts=[ToolCallPart(tool_name, content)])
+
+    async def stream(
+        messages: list[ModelMessage], info: AgentInfo
+    ) -> AsyncIterator[str | dict[int, DeltaToolCall]]:
+        tool_name, content = choose_output(script, messages, info)
+        pieces = chunks(content, chunk_count)
+        for number, piece in enumerate(pieces):
+            await asyncio.sleep(delay / len(pieces))
+            if tool_name is None:
+                yield piece
+            else:
+                name = tool_name if number == 0 else None
+                yield {0: DeltaToolCall(name=name, json_args=piece)}
+
+    return FunctionModel(respond, stream_function=stream, model_name="local")
@@ -1,16 +1,25 @@
+import asyncio
 from pydantic_ai import Agent, RunContext
 from pydantic import BaseModel, Field
 from pydantic_ai.models.google import GoogleModel
 from pydantic_ai.providers.google import GoogleProvider
-from typing import Optional, Any, Union, Literal
-from datetime import date, timedelta
+from typing import AsyncIterator, Optional, Any, Union, Literal
+from datetime import date
 from decimal import Decimal
-from collections import defaultdict
-from sqlalchemy import func
-from sqlalchemy.orm import Session, joinedload
-from config import GEMINI_KEY
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import GEMINI_KEY, LLM_BACKEND
 
+from app import metrics
+from database import db_client
 from database.models import Category, Transactions, Type
+from app.services import (
+    category_catalog,
+    local_model,
+    summary_cache,
+    transaction_rules,
+)
+from app.services.summary_digest import build_summary_digest, format_digest
 
 
 class TransactionData(BaseModel):
@@ -53,14 +62,21 @@ class Deps(BaseModel):
     db_session: Any
 
 
+# How long to batch streamed tokens before yielding an updated reply
+STREAM_DEBOUNCE_SECONDS = 0.1
+
+
 def create_gemini_model():
     provider = GoogleProvider(api_key=GEMINI_KEY)
     return GoogleModel("gemini-2.5-flash", provider=provider)
 
 
-EXISTING_AGENT = None
+def create_model():
+    if LLM_BACKEND == "local":
+        return local_model.create_local_model()
+    return create_gemini_model()
+
 
-gemini_model = create_gemini_model()
 SYSTEM_PROMPT_TEMPLATE = """
 You are a helpful financial assistant for a personal finance app.
 Your primary job is to understand the user's message and respond with the appropriate structured data.
@@ -85,47 +101,32 @@ First, determine the user's intent.
 """
 
 
-def get_all_categories_from_db(db: Session) -> dict[str, list[str]]:
-    """Fetches all categories and organizes them by type."""
-    categories_by_type = defaultdict(list)
-    all_categories = db.query(Category).all()
-    for cat in all_categories:
-        categories_by_type[cat.type.name].append(cat.name)
-    return dict(categories_by_type)
-
-
-def create_agent(dynamic_prompt):
+def create_agent(model, dynamic_prompt):
     financial_agent = Agent(
-        model=gemini_model,
+        model=model,
         output_type=Union[TransactionData, SummaryRequest, ConversationalResponse],
         system_prompt=dynamic_prompt,
     )
     return financial_agent
 
 
-def create_summary_agent():
+def create_summary_agent(model):
     transactions_summary_agent = Agent(
-        model=gemini_model,
+        model=model,
         output_type=str,
         system_prompt=(
             """
-    You are a financial data analyst assistant. Your task is to take a series of financial records and provide a clear and concise summary.
+    You are a financial data analyst assistant. Your task is to take a pre-aggregated digest of a user's transactions and provide a clear and concise summary.
 
     Instructions:
 
-    Given transactions are in indian rupees.
-
-    Calculate Key Figures:
-
-        Calculate the Total Income by summing up all records with type: Type.Income.
-
-        Calculate the Total Expenses by summing up all records with type: Type.Expense.
-
+    Given amounts are in indian rupees.
 
+    The digest already contains the totals: Total Income, Total Expenses, Net Flow and the number of transactions, per-category totals with their change against the previous period of the same length, and the largest transaction descriptions. Use these figures as given; do not recompute or invent numbers.
 
     Structure the Summary: Present the information in the following format:
 
-        A section for "Key Figures" listing Total Income, Total Expenses, and Net Flow.
+        A section for "Key Figures" listing Total Income, Total Expenses, and Net Flow, mentioning notable changes against the previous period.
 
         A "Breakdown of Transactions" section.
 
@@ -133,82 +134,149 @@ def create_summary_agent():
 
         Under "Income," list the total amount received and specify the sources (categories).
 
-        Under "Expenses by Category," list each expense category that appeared in the data. For each category, provide the total amount spent and a brief description of the items in parentheses, based on the comment field.
+        Under "Expenses by Category," list each expense category in the digest. For each category, provide the total amount spent and a brief description of the items in parentheses, based on the largest descriptions.
 
     Formatting: Use Markdown for clear formatting, including bolding for titles and key terms.
 
-        Example Input Data Format:
-
-        Record X:
-        - date: YYYY-MM-DD
-        - amount: 0.00
-        - type: Type.Expense or Type.Income
-        - comment: description of the transaction
-        - category: Transaction Category
-
-
     """
         ),
     )
     return transactions_summary_agent
 
 
-def get_or_create_category(
-    db: Session, category_name: str, transaction_type: str
-) -> Category:
-    """Get existing category or create new one"""
-    type_enum = Type.Income if transaction_type == "Income" else Type.Expense
+def build_system_prompt(categories: dict[str, list[str]]) -> str:
+    expense_cats = categories.get("Expense", [])
+    income_cats = categories.get("Income", [])
 
-    print(category_name)
-    category = (
-        db.query(Category)
-        .filter(
-            func.lower(Category.name) == func.lower(category_name),
-            Category.type == type_enum.value,
-        )
-        .first()
+    if "miscellaneous" not in expense_cats:
+        expense_cats.append("miscellaneous")
+    if "other income" not in income_cats:
+        income_cats.append("other income")
+
+    category_guidance = (
+        f"Available Expense Categories: {', '.join(sorted(expense_cats))}\n"
+        f"    Available Income Categories: {', '.join(sorted(income_cats))}"
     )
+    return SYSTEM_PROMPT_TEMPLATE.format(category_guidance=category_guidance)
 
-    if not category:
-        category = Category(name=category_name, type=type_enum)
-        db.add(category)
-        db.commit()
-        db.refresh(category)
 
-    return category
+class AgentRegistry:
+    """Process-wide financial and summary agents.
 
+    The financial agent's prompt lists the categories, so it is rebuilt only
+    when the category catalog version changes; the model (chosen by
+    LLM_BACKEND) and the summary agent are created once, on first use rather
+    than at import. Concurrent websocket sessions share the agents and a lock ensures
+    a rebuild happens once rather than per waiting message.
+    """
 
-async def process_message(user_message: str, user_id: int, db: Session):
-    global EXISTING_AGENT
-    deps = Deps(user_id=user_id, db_session=db)
+    def __init__(self):
+        self.model = None
+        self.built_version = None
+        self.financial_agent = None
+        self.summary_agent = None
+        self.lock = asyncio.Lock()
+
+    async def get(self, db: AsyncSession) -> tuple[Agent, Agent]:
+        categories = await category_catalog.catalog.get(db)
+        if self.built_version != categories.version:
+            async with self.lock:
+                if self.built_version != categories.version:
+                    if self.model is None:
+                        self.model = create_model()
+                    self.financial_agent = create_agent(
+                        self.model, build_system_prompt(categories.names_by_type())
+                    )
+                    if self.summary_agent is None:
+                        self.summary_agent = create_summary_agent(self.model)
+                    self.built_version = categories.version
+        return self.financial_agent, self.summary_agent
 
-    if not EXISTING_AGENT:
-        categories = get_all_categories_from_db(db)
-        expense_cats = categories.get("Expense", [])
-        income_cats = categories.get("Income", [])
 
-        if "miscellaneous" not in expense_cats:
-            expense_cats.append("miscellaneous")
-        if "other income" not in income_cats:
-            income_cats.append("other income")
+agent_registry = AgentRegistry()
 
-        category_guidance = (
-            f"Available Expense Categories: {', '.join(sorted(expense_cats))}\n"
-            f"    Available Income Categories: {', '.join(sorted(income_cats))}"
-        )
 
-        transactions_summary_agent = create_summary_agent()
-        financial_agent = create_agent(
-            SYSTEM_PROMPT_TEMPLATE.format(category_guidance=category_guidance)
-        )
+async def get_or_create_category(
+    db: AsyncSession, category_name: str, transaction_type: str
+) -> Optional[category_catalog.CategoryEntry]:
+    """Get existing category or create new one.
+
+    Category names are unique across both types, so None is returned when
+    the name already belongs to a category of the other type.
+    """
+    type_enum = Type.Income if transaction_type == "Income" else Type.Expense
+
+    categories = await category_catalog.catalog.get(db)
+    category = categories.find(category_name, type_enum)
+    if category or any(categories.find(category_name, type) for type in Type):
+        return category
+
+    new_category = Category(name=category_name, type=type_enum)
+    db.add(new_category)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Created by a concurrent request since the catalog was read
+        await db.rollback()
+        category_catalog.catalog.invalidate()
+        return (await category_catalog.catalog.get(db)).find(category_name, type_enum)
+    category_catalog.catalog.invalidate()
+    return category_catalog.CategoryEntry(
+        new_category.id, new_category.name, new_category.type
+    )
+
+
+async def stream_message(
+    user_message: str, user_id: int, db: AsyncSession
+) -> AsyncIterator[str]:
+    """Yield the reply as it grows; every item is the full text so far.
+
+    Conversational answers stream while the financial agent is still
+    generating, and summaries stream from the summary agent, so the first
+    words arrive long before the complete answer.
+    """
+    deps = Deps(user_id=user_id, db_session=db)
+    financial_agent, transactions_summary_agent = await agent_registry.get(db)
+
+    streamed = ""
     try:
-        response = await financial_agent.run(user_message, deps=deps)
-        result_data = response.output
+        # Simple transaction logs are parsed locally; the agent only sees
+        # messages the rules are not confident about.
+        parsed = transaction_rules.match(
+            user_message, await category_catalog.catalog.get(db)
+        )
+        if parsed:
+            result_data = TransactionData(**parsed)
+        else:
+            with metrics.LLMCall("financial") as call:
+                async with financial_agent.run_stream(
+                    user_message, deps=deps
+                ) as response:
+                    async for partial in response.stream(
+                        debounce_by=STREAM_DEBOUNCE_SECONDS
+                    ):
+                        if (
+                            isinstance(partial, ConversationalResponse)
+                            and partial.response
+                            and partial.response != streamed
+                        ):
+                            streamed = partial.response
+                            yield streamed
+                    result_data = await response.get_output()
+                    call.usage = response.usage()
 
         if isinstance(result_data, TransactionData):
-            category = get_or_create_category(
+            category = await get_or_create_category(
                 db, result_data.category, result_data.transaction_type
             )
+            if category is None:
+                yield (
+                    f"'{result_data.category}' is already a category for a "
+                    f"different transaction type, so I couldn't file this "
+                    f"{result_data.transaction_type.lower()} under it. Please "
+                    "try again with another category."
+                )
+                return
 
             new_transaction = Transactions(
                 user_id=user_id,
@@ -222,108 +290,85 @@ async def process_message(user_message: str, user_id: int, db: Session):
             )
 
             db.add(new_transaction)
-            db.commit()
-            db.refresh(new_transaction)
+            await db.commit()
+            await db.refresh(new_transaction)
 
-            return f"✅ Added {result_data.transaction_type.lower()} of ₹{result_data.amount:,.2f} in {result_data.category} for '{result_data.description}'."
+            yield f"✅ Added {result_data.transaction_type.lower()} of ₹{result_data.amount:,.2f} in {result_data.category} for '{result_data.description}'."
 
         elif isinstance(result_data, SummaryRequest):
-            cut_off_date = date.today() - timedelta(days=result_data.period_days)
-            if result_data.category_filter and result_data.transaction_type_filter:
-                category = get_or_create_category(
-                    db, result_data.category_filter, result_data.transaction_type_filter
-                )
-                summary = (
-                    db.query(
-                        Transactions.date,
-                        Transactions.amount,
-                        Transactions.type,
-                        Transactions.comment,
-                        Category.name.label("category"),
-                    )
-                    .join(Category)
-                    .filter(
-                        Transactions.category_id == category.id,
-                        Transactions.date >= cut_off_date,
-                    )
-                    .all()
+            categories = await category_catalog.catalog.get(db)
+            category = None
+            notes = []
+            if result_data.category_filter:
+                types = (
+                    [Type(result_data.transaction_type_filter)]
+                    if result_data.transaction_type_filter
+                    else list(Type)
                 )
-            elif result_data.transaction_type_filter:
-                summary = (
-                    db.query(
-                        Transactions.date,
-                        Transactions.amount,
-                        Transactions.type,
-                        Transactions.comment,
-                        Category.name.label("category"),
-                    )
-                    .join(Category)
-                    .filter(
-                        Transactions.type == result_data.transaction_type_filter,
-                        Transactions.date >= cut_off_date,
-                    )
-                    .all()
+                category = next(
+                    filter(
+                        None,
+                        (
+                            categories.find(result_data.category_filter, t)
+                            for t in types
+                        ),
+                    ),
+                    None,
                 )
-            else:
-                summary = (
-                    db.query(
-                        Transactions.date,
-                        Transactions.amount,
-                        Transactions.type,
-                        Transactions.comment,
-                        Category.name.label("category"),
+                if category is None:
+                    notes.append(
+                        f"Note: no category named '{result_data.category_filter}'; "
+                        "showing all categories."
                     )
-                    .join(Category)
-                    .filter(
-                        Transactions.date >= cut_off_date,
-                    )
-                    .all()
+
+            key = summary_cache.summary_key(
+                user_id,
+                result_data.period_days,
+                result_data.transaction_type_filter,
+                category.id if category else None,
+                notes,
+            )
+            cached = summary_cache.get_summary(key)
+            if cached:
+                yield cached
+                return
+
+            async with db_client.read_session(user_id) as read_db:
+                digest = await build_summary_digest(
+                    read_db,
+                    user_id,
+                    result_data.period_days,
+                    result_data.transaction_type_filter,
+                    category.id if category else None,
+                    category.name if category else None,
                 )
-            llm_input = format_for_llm(summary, "Transactions")
-            response = await transactions_summary_agent.run(llm_input)
-            return response.output
+            digest.notes += notes
+            llm_input = format_digest(digest)
+            text = ""
+            with metrics.LLMCall("summary") as call:
+                async with transactions_summary_agent.run_stream(llm_input) as response:
+                    async for text in response.stream_text(
+                        debounce_by=STREAM_DEBOUNCE_SECONDS
+                    ):
+                        yield text
+                    call.usage = response.usage()
+            summary_cache.store_summary(key, text)
 
         elif isinstance(result_data, ConversationalResponse):
-            return result_data.response
+            if result_data.response != streamed:
+                yield result_data.response
 
         else:
-            return "I'm sorry, I'm not sure how to handle that request. Please try rephrasing."
+            yield "I'm sorry, I'm not sure how to handle that request. Please try rephrasing."
 
     except Exception as e:
         print(f"An error occurred: {e}")
-        return "I'm sorry, I wasn't able to process that. Could you please try rephrasing it?"
-
-
-def format_for_llm(records, table_name="Records"):
-    """Most reliable version that works with any SQLAlchemy result"""
-    if not records:
-        return f"No {table_name.lower()} found."
-
-    output = f"{table_name} Data Summary:\n"
-    output += f"Total records: {len(records)}\n\n"
-
-    for i, record in enumerate(records, 1):
-        output += f"Record {i}:\n"
-
-        # Handle different types of records
-        if hasattr(record, "_fields"):  # Named tuple
-            for field in record._fields:
-                value = getattr(record, field)
-                output += f"  - {field}: {value}\n"
-
-        elif hasattr(record, "keys"):  # Row object
-            for key in record.keys():
-                value = record[key]
-                output += f"  - {key}: {value}\n"
-
-        elif hasattr(record, "__table__"):  # Model instance
-            for col in record.__table__.columns:
-                value = getattr(record, col.key)
-                output += f"  - {col.key}: {value}\n"
-
-        else:  # Fallback - convert to string
-            output += f"  - data: {record}\n"
+        yield "I'm sorry, I wasn't able to process that. Could you please try rephrasing it?"
 
-        output += "\n"
 
-    return output
+async def process_message(user_message: str, user_id: int, db: AsyncSession) -> str:
+    """Complete reply for callers that do not stream"""
+    reply = ""
+    async for reply in stream_message(user_message, user_id, db):
+        pass
+    return reply
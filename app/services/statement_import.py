@@ -0,0 +1,270 @@
+"""
+Bank statement import.
+
+Statements are parsed row by row from the uploaded file, validated with
+schema.CreateTransaction and written in batches of IMPORT_BATCH_SIZE, so
+memory stays bounded by one batch however long the statement is. Batches
+go through COPY on Postgres and a single executemany INSERT elsewhere, all
+inside one transaction, and the transaction_totals rollup is updated on
+the same connection. Row errors are reported and skipped; an error that
+stops the file being read (bad encoding, no usable header) rolls the whole
+import back. The upload is read off the event loop, a batch at a time.
+"""
+
+import csv
+import re
+from itertools import islice
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import IO, Iterator, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import schema
+from app.services import category_catalog
+from database import rollups
+from database.models import Transactions, Type, money
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 500
+DEFAULT_CATEGORIES = {Type.Expense: "Miscellaneous", Type.Income: "Other Income"}
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y", "%d %b %Y", "%Y%m%d")
+COLUMNS = ["user_id", "category_id", "amount", "type", "comment", "date"]
+
+HEADER_ALIASES = {
+    "date": ("date", "transaction date", "txn date", "value date", "posted date"),
+    "amount": ("amount", "transaction amount"),
+    "debit": ("debit", "withdrawal", "withdrawal amt.", "withdrawal amount", "dr"),
+    "credit": ("credit", "deposit", "deposit amt.", "deposit amount", "cr"),
+    "type": ("type", "transaction type", "cr/dr"),
+    "category": ("category",),
+    "comment": ("comment", "description", "narration", "details", "memo"),
+}
+
+
+class RowError(ValueError):
+    pass
+
+
+def parse_date(value: str) -> date:
+    value = value.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise RowError(f"Unrecognised date '{value}'")
+
+
+def parse_amount(value: str) -> Optional[Decimal]:
+    cleaned = re.sub(r"[^\d.\-]", "", value or "")
+    if not cleaned:
+        return None
+    try:
+        return Decimal(cleaned)
+    except InvalidOperation:
+        raise RowError(f"Unrecognised amount '{value}'")
+
+
+def normalise_header(header: list[str]) -> dict[str, int]:
+    positions = {}
+    folded = [column.strip().casefold() for column in header]
+    for field, aliases in HEADER_ALIASES.items():
+        for index, column in enumerate(folded):
+            if column in aliases:
+                positions[field] = index
+                break
+    if "date" not in positions or not (
+        "amount" in positions or "debit" in positions or "credit" in positions
+    ):
+        raise RowError(
+            "Statement needs a date column and an amount/debit/credit column"
+        )
+    return positions
+
+
+def read_csv(stream: IO[str]) -> Iterator[tuple[int, dict]]:
+    """Yield (line number, raw row) from a CSV statement"""
+    reader = csv.reader(stream)
+    positions = normalise_header(next(reader, []))
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+
+        def cell(field):
+            index = positions.get(field)
+            return row[index].strip() if index is not None and index < len(row) else ""
+
+        try:
+            debit, credit = parse_amount(cell("debit")), parse_amount(cell("credit"))
+            amount = parse_amount(cell("amount"))
+        except RowError as e:
+            yield reader.line_num, e
+            continue
+        type_value = cell("type").casefold()
+        if debit:
+            amount, type = debit, Type.Expense
+        elif credit:
+            amount, type = credit, Type.Income
+        elif amount is None:
+            yield reader.line_num, RowError("Missing amount")
+            continue
+        elif type_value in ("expense", "debit", "dr"):
+            type = Type.Expense
+        elif type_value in ("income", "credit", "cr"):
+            type = Type.Income
+        else:
+            type = Type.Expense if amount < 0 else Type.Income
+
+        yield (
+            reader.line_num,
+            {
+                "date": cell("date"),
+                "amount": abs(amount),
+                "type": type,
+                "category": cell("category"),
+                "comment": cell("comment") or None,
+            },
+        )
+
+
+def read_ofx(stream: IO[str]) -> Iterator[tuple[int, dict]]:
+    """Yield (transaction number, raw row) from an OFX/QFX statement.
+
+    Handles both the SGML (unclosed tags) and XML flavours by reading one
+    <STMTTRN> block at a time.
+    """
+    block, number = None, 0
+    for line in stream:
+        for tag, value in re.findall(r"<(/?[A-Za-z.]+)>([^<\r\n]*)", line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                block = {}
+            elif tag == "/STMTTRN" and block is not None:
+                number += 1
+                try:
+                    amount = parse_amount(block.get("TRNAMT", ""))
+                    if amount is None:
+                        raise RowError("Missing amount")
+                    yield (
+                        number,
+                        {
+                            "date": block.get("DTPOSTED", "")[:8],
+                            "amount": abs(amount),
+                            "type": Type.Expense if amount < 0 else Type.Income,
+                            "category": block.get("NAME", ""),
+                            "comment": block.get("MEMO") or block.get("NAME"),
+                        },
+                    )
+                except RowError as e:
+                    yield number, e
+                block = None
+            elif block is not None and value.strip():
+                block[tag] = value.strip()
+
+
+async def insert_batch(db: AsyncSession, rows: list[dict]):
+    connection = await db.connection()
+    # The rollup upsert goes first: asyncpg's adapter only opens the
+    # transaction on the first statement, and a COPY sent before that would
+    # commit on its own.
+    deltas = rollups.deltas_for_rows(rows)
+    await connection.run_sync(lambda sync_conn: rollups.apply_deltas(sync_conn, deltas))
+    if connection.dialect.name == "postgresql":
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            Transactions.__tablename__,
+            records=[
+                tuple(
+                    row[column].value if column == "type" else row[column]
+                    for column in COLUMNS
+                )
+                for row in rows
+            ],
+            columns=COLUMNS,
+        )
+    else:
+        await connection.execute(insert(Transactions.__table__), rows)
+
+
+async def import_statement(
+    db: AsyncSession, user_id: int, stream: IO[str], format: str = "csv"
+) -> dict:
+    """Parse, validate and insert a statement; returns counts and row errors"""
+    categories = await category_catalog.catalog.get(db)
+    inserted, failed, errors, batch = 0, 0, [], []
+
+    def fail(line, message):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": line, "error": message})
+
+    async def abort(message):
+        # A file-level error: keep none of the statement, so a corrected
+        # upload does not duplicate the rows that came before the error
+        await db.rollback()
+        return {
+            "inserted": 0,
+            "failed": failed + 1,
+            "errors": [{"row": 0, "error": message}, *errors],
+        }
+
+    rows = read_ofx(stream) if format == "ofx" else read_csv(stream)
+    try:
+        while True:
+            # The upload may be spooled to disk, so reading and decoding
+            # happen off the event loop, one batch of raw rows at a time
+            chunk = await run_in_threadpool(list, islice(rows, IMPORT_BATCH_SIZE))
+            if not chunk:
+                break
+            for line, raw in chunk:
+                if isinstance(raw, RowError):
+                    fail(line, str(raw))
+                    continue
+                try:
+                    # OFX has no category field; its payee (NAME) and the
+                    # description are tried as category names before the default
+                    category = (
+                        categories.find(raw["category"], raw["type"])
+                        or categories.find(raw["comment"] or "", raw["type"])
+                        or categories.find(DEFAULT_CATEGORIES[raw["type"]], raw["type"])
+                    )
+                    if category is None:
+                        raise RowError(f"No category for '{raw['category']}'")
+                    transaction = schema.CreateTransaction(
+                        date=parse_date(raw["date"]),
+                        type=raw["type"].value,
+                        amount=raw["amount"],
+                        category_id=category.id,
+                        user_id=user_id,
+                        comment=raw["comment"],
+                    )
+                except (RowError, ValidationError) as e:
+                    fail(line, str(e))
+                    continue
+
+                batch.append(
+                    {
+                        **transaction.model_dump(),
+                        "type": raw["type"],
+                        "amount": money(raw["amount"]),
+                    }
+                )
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    await insert_batch(db, batch)
+                    inserted += len(batch)
+                    batch = []
+    except RowError as e:
+        return await abort(str(e))
+    except UnicodeDecodeError:
+        return await abort("Statement is not valid UTF-8 text")
+
+    if batch:
+        await insert_batch(db, batch)
+        inserted += len(batch)
+    await db.commit()
+    return {"inserted": inserted, "failed": failed, "errors": errors}
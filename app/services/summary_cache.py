@@ -0,0 +1,60 @@
+"""
+Cache of chat summary replies.
+
+A summary depends on the user, the period and filters, today's date (the
+period ends today) and the user's transactions. The last is captured by
+the user's data version, which is bumped after every commit that changes
+their transactions, so entries from before a change are never served
+again and age out of the LRU bound.
+"""
+
+import threading
+from datetime import date
+from typing import Iterable, Optional
+
+from cachetools import LRUCache
+
+from config import SUMMARY_CACHE_SIZE
+from database import data_versions
+
+summary_cache = LRUCache(maxsize=SUMMARY_CACHE_SIZE)
+summary_cache_lock = threading.Lock()
+summary_cache_stats = {"hits": 0, "misses": 0}
+
+
+def summary_key(
+    user_id: int,
+    period_days: int,
+    type_filter: Optional[str],
+    category_id: Optional[int],
+    notes: Iterable[str] = (),
+) -> tuple:
+    # Read the version before querying, so a write that commits while the
+    # summary is generated leaves the entry under the outdated version.
+    return (
+        user_id,
+        date.today(),
+        period_days,
+        type_filter,
+        category_id,
+        tuple(notes),
+        data_versions.get(user_id),
+    )
+
+
+def get_summary(key: tuple) -> Optional[str]:
+    with summary_cache_lock:
+        summary = summary_cache.get(key)
+        summary_cache_stats["hits" if summary else "misses"] += 1
+    return summary
+
+
+def store_summary(key: tuple, summary: str):
+    if summary:
+        with summary_cache_lock:
+            summary_cache[key] = summary
+
+
+def hit_ratio() -> float:
+    total = summary_cache_stats["hits"] + summary_cache_stats["misses"]
+    return summary_cache_stats["hits"] / total if total else 0.0
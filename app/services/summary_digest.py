@@ -0,0 +1,228 @@
+"""
+Compact, SQL-aggregated input for the chat summary agent.
+
+Instead of sending every matching row to the LLM, the summary path asks the
+database for per-category totals over the requested period and the one
+before it, plus the largest descriptions, and renders them into a digest
+capped at SUMMARY_TOKEN_BUDGET tokens. Prompt size, latency and cost then
+no longer depend on how many transactions the user has.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import case, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import SUMMARY_TOKEN_BUDGET
+from database.models import Category, Transactions, Type
+
+CHARS_PER_TOKEN = 4
+TOP_DESCRIPTIONS = 10
+
+
+@dataclass
+class CategoryTotal:
+    category: str
+    type: Type
+    total: Decimal = Decimal("0")
+    count: int = 0
+    previous_total: Decimal = Decimal("0")
+
+
+@dataclass
+class SummaryDigest:
+    start: date
+    end: date
+    period_days: int
+    type_filter: Optional[Type]
+    category_filter: Optional[str]
+    categories: list[CategoryTotal] = field(default_factory=list)
+    top_descriptions: list[tuple[str, str, Decimal, int]] = field(default_factory=list)
+    notes: list[str] = field(default_factory=list)
+
+    def total(self, type: Type, previous: bool = False) -> Decimal:
+        return sum(
+            (c.previous_total if previous else c.total)
+            for c in self.categories
+            if c.type == type
+        ) or Decimal("0")
+
+    @property
+    def count(self) -> int:
+        return sum(c.count for c in self.categories)
+
+
+def to_decimal(value) -> Decimal:
+    return Decimal(str(value or 0)).quantize(Decimal("0.01"))
+
+
+def digest_queries(
+    user_id: int,
+    cut_off_date: date,
+    previous_cut_off_date: date,
+    type_filter: Optional[Type] = None,
+    category_id: Optional[int] = None,
+):
+    """Per-category totals for both periods and the top descriptions"""
+    filters = [
+        Transactions.user_id == user_id,
+        Transactions.date >= previous_cut_off_date,
+    ]
+    if type_filter:
+        filters.append(Transactions.type == type_filter)
+    if category_id:
+        filters.append(Transactions.category_id == category_id)
+
+    # Period is computed in a subquery so the outer GROUP BY references a
+    # plain column rather than repeating a parameterised CASE expression.
+    rows = (
+        select(
+            case(
+                (Transactions.date >= cut_off_date, literal("current")),
+                else_=literal("previous"),
+            ).label("period"),
+            Transactions.type,
+            Category.name.label("category"),
+            Transactions.amount,
+        )
+        .join(Category)
+        .filter(*filters)
+        .subquery()
+    )
+    per_category = select(
+        rows.c.period,
+        rows.c.type,
+        rows.c.category,
+        func.sum(rows.c.amount).label("total"),
+        func.count().label("count"),
+    ).group_by(rows.c.period, rows.c.type, rows.c.category)
+
+    top = (
+        select(
+            Transactions.comment,
+            Category.name.label("category"),
+            func.sum(Transactions.amount).label("total"),
+            func.count().label("count"),
+        )
+        .join(Category)
+        .filter(
+            *filters,
+            Transactions.date >= cut_off_date,
+            Transactions.comment.is_not(None),
+            Transactions.comment != "",
+        )
+        .group_by(Transactions.comment, Category.name)
+        .order_by(func.sum(Transactions.amount).desc())
+        .limit(TOP_DESCRIPTIONS)
+    )
+    return per_category, top
+
+
+async def build_summary_digest(
+    db: AsyncSession,
+    user_id: int,
+    period_days: int,
+    type_filter: Optional[str] = None,
+    category_id: Optional[int] = None,
+    category_name: Optional[str] = None,
+) -> SummaryDigest:
+    """Aggregate the user's transactions for the period and the one before"""
+    end = date.today()
+    cut_off_date = end - timedelta(days=period_days)
+    previous_cut_off_date = cut_off_date - timedelta(days=period_days)
+    type_enum = Type(type_filter) if type_filter else None
+
+    per_category_query, top_query = digest_queries(
+        user_id, cut_off_date, previous_cut_off_date, type_enum, category_id
+    )
+    per_category = await db.execute(per_category_query)
+
+    totals = {}
+    for row in per_category:
+        key = (row.type, row.category)
+        entry = totals.setdefault(key, CategoryTotal(row.category, row.type))
+        if row.period == "current":
+            entry.total = to_decimal(row.total)
+            entry.count = row.count
+        else:
+            entry.previous_total = to_decimal(row.total)
+
+    top = await db.execute(top_query)
+
+    digest = SummaryDigest(
+        start=cut_off_date,
+        end=end,
+        period_days=period_days,
+        type_filter=type_enum,
+        category_filter=category_name,
+        categories=sorted(
+            totals.values(), key=lambda c: (c.type.value, -c.total, c.category)
+        ),
+        top_descriptions=[
+            (row.comment, row.category, to_decimal(row.total), row.count) for row in top
+        ],
+    )
+    return digest
+
+
+def change(current: Decimal, previous: Decimal) -> str:
+    if not previous:
+        return "no previous data" if current else "unchanged"
+    return f"{(current - previous) / previous * 100:+.1f}% vs {previous:,.2f}"
+
+
+def format_digest(digest: SummaryDigest, token_budget: int = SUMMARY_TOKEN_BUDGET):
+    """Render the digest, dropping the smallest entries past the budget"""
+    budget = token_budget * CHARS_PER_TOKEN
+    income, expense = digest.total(Type.Income), digest.total(Type.Expense)
+    previous_income = digest.total(Type.Income, previous=True)
+    previous_expense = digest.total(Type.Expense, previous=True)
+    filters = [
+        f"type={digest.type_filter.value}" if digest.type_filter else None,
+        f"category={digest.category_filter}" if digest.category_filter else None,
+    ]
+
+    lines = [
+        f"Period: last {digest.period_days} days ({digest.start} to {digest.end}), "
+        f"compared with the {digest.period_days} days before.",
+        f"Filters: {', '.join(f for f in filters if f) or 'none'}",
+        *digest.notes,
+        "",
+        "Key figures:",
+        f"- Total Income: {income:,.2f} ({change(income, previous_income)})",
+        f"- Total Expenses: {expense:,.2f} ({change(expense, previous_expense)})",
+        f"- Net Flow: {income - expense:,.2f}",
+        f"- Transactions: {digest.count}",
+    ]
+    used = sum(len(line) + 1 for line in lines)
+
+    sections = defaultdict(list)
+    for c in digest.categories:
+        if c.count:
+            sections[f"{c.type.value} by category (total, count, change):"].append(
+                f"- {c.category}: {c.total:,.2f} across {c.count} "
+                f"({change(c.total, c.previous_total)})"
+            )
+    sections["Largest descriptions (description, category, total, count):"] = [
+        f'- "{comment}" ({category}): {total:,.2f} across {count}'
+        for comment, category, total, count in digest.top_descriptions
+    ]
+
+    for title, entries in sections.items():
+        if not entries or used + len(title) + 2 > budget:
+            continue
+        lines += ["", title]
+        used += len(title) + 2
+        for shown, entry in enumerate(entries):
+            if used + len(entry) + 1 > budget:
+                lines.append(f"- ...and {len(entries) - shown} more")
+                used += 20
+                break
+            lines.append(entry)
+            used += len(entry) + 1
+
+    return "\n".join(lines)
@@ -0,0 +1,236 @@
+"""
+Rule-based parsing of simple transaction messages.
+
+Messages such as "spent 250 on groceries yesterday" or "got salary 50000"
+are parsed locally: one amount, an optional date word, and a keyword that
+names exactly one category in the catalog. Anything the rules are unsure
+about (questions, several amounts, no or conflicting categories, future
+or unrecognised dates, negations) returns None, and the message goes to the LLM agent as
+before. stats counts hits and misses of the fast path.
+"""
+
+import re
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+
+from app.services.category_catalog import CategorySnapshot
+from app.services.statement_import import RowError, parse_date
+from database.models import Type
+
+EXPENSE_WORDS = set(
+    "spent spend paid pay bought buy purchased expense cost debited".split()
+)
+INCOME_WORDS = set(
+    "got received receive earned earn income credited refund refunded".split()
+)
+# Words that mean the message is not a plain transaction log
+UNSURE_WORDS = set(
+    "how what why when which summary summarize show total report much many not "
+    "didn't dont don't never tomorrow next will should budget delete remove "
+    "update change and".split()
+)
+FILLER_WORDS = set(
+    "i i've ive we my a an the on for of at in to from rs inr rupees rupee ₹ "
+    "worth just was as some with".split()
+)
+WEEKDAYS = "monday tuesday wednesday thursday friday saturday sunday".split()
+# Date words DATE_PATTERNS does not resolve; a message still containing one
+# after its date is taken out names a date the rules cannot work out
+DATE_WORDS = set(
+    "january february march april may june july august september october "
+    "november december jan feb mar apr jun jul aug sep sept oct nov dec week "
+    "weeks month months year years ago last next yesterday today".split()
+) | set(WEEKDAYS)
+ORDINAL_PATTERN = re.compile(r"\b\d+(?:st|nd|rd|th)\b")
+# "in"/"on" followed by a number, as in "on 3" or "in 2024"
+DATE_NUMBER_PATTERN = re.compile(r"\b(?:in|on) \d")
+
+# "|"-separated keywords for the default categories; every catalog name
+# matches its own category as well.
+KEYWORDS = {
+    Type.Expense: {
+        "Groceries": "grocery|groceries|vegetables|veggies|fruits|milk|supermarket",
+        "Food & Dining": "food|lunch|dinner|breakfast|restaurant|cafe|coffee|tea|"
+        "snacks|swiggy|zomato|pizza|burger",
+        "Fuel": "fuel|petrol|diesel|cng",
+        "Transportation": "uber|ola|taxi|cab|auto|bus|metro|train|parking|toll",
+        "Shopping": "shopping|clothes|shoes|amazon|flipkart|myntra",
+        "Entertainment": "movie|movies|cinema|concert|games",
+        "Subscriptions": "subscription|netflix|spotify|hotstar|prime",
+        "Bills & Utilities": "bill|bills|electricity|water|internet|wifi|broadband|"
+        "recharge|rent|gas",
+        "Healthcare & Medical": "doctor|medicine|medicines|pharmacy|hospital|"
+        "medical|dentist",
+        "Education": "books|course|tuition|school|college",
+        "Travel": "flight|hotel|trip|vacation",
+        "Credit Card Bill": "credit card|credit card bill",
+        "Home Loan": "home loan",
+        "Personal Loan": "personal loan",
+        "EMI": "emi",
+    },
+    Type.Income: {
+        "Salary": "salary|paycheck|wages",
+        "Freelance": "freelance|freelancing|gig",
+        "Business Income": "business",
+        "Investments": "dividend|dividends|interest|stocks",
+        "Gifts": "gift|gifted",
+        "Refund": "refund|refunded|cashback",
+    },
+}
+
+AMOUNT_PATTERN = re.compile(
+    r"(?<![\w./-])(?:₹|rs\.?|inr)?\s*(\d[\d,]*(?:\.\d+)?)\s*(k|lakhs?|rs)?(?![\w/-])",
+    re.IGNORECASE,
+)
+DATE_PATTERNS = [
+    (re.compile(r"\bday before yesterday\b"), lambda m, today: today - timedelta(2)),
+    (re.compile(r"\byesterday\b"), lambda m, today: today - timedelta(1)),
+    (re.compile(r"\btoday\b"), lambda m, today: today),
+    (
+        re.compile(r"\b(\d{1,3}) days? ago\b"),
+        lambda m, today: today - timedelta(int(m.group(1))),
+    ),
+    (
+        re.compile(r"\b(?:last|on) (" + "|".join(WEEKDAYS) + r")\b"),
+        lambda m, today: today
+        - timedelta((today.weekday() - WEEKDAYS.index(m.group(1)) - 1) % 7 + 1),
+    ),
+    (
+        re.compile(r"\b(\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{2,4})\b"),
+        lambda m, today: parse_date(m.group(1)),
+    ),
+]
+
+stats = {"hits": 0, "misses": 0}
+
+
+def phrase_index(categories: CategorySnapshot) -> dict[str, set[tuple[str, Type]]]:
+    """Folded keyword/phrase -> (category name, type) pairs in the catalog"""
+    index = {}
+    for type, cats in categories.by_type.items():
+        for cat in cats:
+            names = {cat.name.casefold()}
+            keywords = KEYWORDS[type].get(cat.name)
+            if keywords:
+                names.update(keywords.split("|"))
+            for name in names:
+                index.setdefault(name, set()).add((cat.name, type))
+    return dict(sorted(index.items(), key=lambda item: -len(item[0])))
+
+
+phrase_indexes: dict[int, dict] = {}
+
+
+def mentions_date(text: str) -> bool:
+    return bool(
+        DATE_WORDS.intersection(re.findall(r"\w+", text))
+        or ORDINAL_PATTERN.search(text)
+        or DATE_NUMBER_PATTERN.search(text)
+    )
+
+
+def find_date(text: str, today: date) -> tuple[Optional[date], str]:
+    """The date a message mentions (today if none) and the text without it.
+
+    The date is None when the message mentions one the patterns cannot
+    resolve, such as "last month" or "3rd jan".
+    """
+    value = today
+    for pattern, resolve in DATE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            try:
+                value = resolve(match, today)
+            except RowError:
+                return None, text
+            text = text[: match.start()] + " " + text[match.end() :]
+            break
+    if mentions_date(text):
+        return None, text
+    return value, text
+
+
+def parse_transaction(
+    message: str, categories: CategorySnapshot, today: Optional[date] = None
+) -> Optional[dict]:
+    """TransactionData fields for a simple message, or None when unsure"""
+    today = today or date.today()
+    text = " ".join(message.casefold().split())
+    if "?" in text:
+        return None
+
+    transaction_date, text = find_date(text, today)
+    if transaction_date is None or transaction_date > today:
+        return None
+
+    amounts = list(AMOUNT_PATTERN.finditer(text))
+    if len(amounts) != 1:
+        return None
+    amount_match = amounts[0]
+    try:
+        amount = Decimal(amount_match.group(1).replace(",", ""))
+    except InvalidOperation:
+        return None
+    suffix = (amount_match.group(2) or "").lower()
+    amount *= 1000 if suffix == "k" else 100000 if suffix.startswith("lakh") else 1
+    if amount <= 0:
+        return None
+    text = text[: amount_match.start()] + " " + text[amount_match.end() :]
+
+    words = re.findall(r"[\w'&₹.]+", text)
+    words = [word.strip(".") for word in words if word.strip(".")]
+    if UNSURE_WORDS.intersection(words):
+        return None
+
+    if categories.version not in phrase_indexes:
+        phrase_indexes.clear()
+        phrase_indexes[categories.version] = phrase_index(categories)
+    index = phrase_indexes[categories.version]
+    # Longest phrases first, consuming what they match, so "credit card bill"
+    # does not also count as a "bill"
+    joined = f" {' '.join(words)} "
+    matches, matched_words = set(), set()
+    for phrase, targets in index.items():
+        if f" {phrase} " in joined:
+            joined = joined.replace(f" {phrase} ", " | ")
+            matches |= targets
+            matched_words.update(phrase.split())
+
+    verb_types = {Type.Expense for word in words if word in EXPENSE_WORDS} | {
+        Type.Income for word in words if word in INCOME_WORDS
+    }
+    if len(verb_types) > 1:
+        return None
+    if verb_types:
+        matches = {match for match in matches if match[1] in verb_types}
+    if len({name for name, _ in matches}) != 1 or len(matches) != 1:
+        return None
+    category, type = matches.pop()
+
+    description = " ".join(
+        word
+        for word in words
+        if word not in FILLER_WORDS
+        and word not in EXPENSE_WORDS
+        and word not in INCOME_WORDS
+    )
+    return {
+        "amount": float(amount),
+        "category": category,
+        "description": description or " ".join(sorted(matched_words)),
+        "transaction_type": type.value,
+        "transaction_date": transaction_date,
+    }
+
+
+def match(message: str, categories: CategorySnapshot) -> Optional[dict]:
+    """parse_transaction, counted in stats"""
+    parsed = parse_transaction(message, categories)
+    stats["hits" if parsed else "misses"] += 1
+    return parsed
+
+
+def hit_rate() -> float:
+    total = stats["hits"] + stats["misses"]
+    return stats["hits"] / total if total else 0.0
@@ -1,6 +1,25 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
+from config import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_LIMIT
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max pinned to the configured cost so hashes made with any other cost
+# are flagged by verify_and_update and rehashed on the next login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+# bcrypt is CPU bound; keep it off the shared AnyIO threadpool so a login
+# burst cannot starve every other endpoint.
+password_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+password_jobs = 0
 
 
 def get_password_hash(password: str):
@@ -9,3 +28,31 @@ def get_password_hash(password: str):
 
 def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
+
+
+async def run_password_job(func, *args):
+    """Run bcrypt work on the password executor, or 503 when saturated"""
+    global password_jobs
+    if password_jobs >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    password_jobs += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, func, *args)
+    finally:
+        password_jobs -= 1
+
+
+async def hash_password(password: str):
+    return await run_password_job(get_password_hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str):
+    """Returns (valid, new_hash); new_hash is set when the cost has changed"""
+    return await run_password_job(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Compare insert throughput of POST /api/transactions/ and /batch.
+
+Runs in-process against main.app through httpx's ASGI transport, using the
+configured database (migrate and seed it first). Creates a throwaway user.
+
+    python -m benchmarks.batch_insert --rows 2000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from datetime import date
+
+import httpx
+
+from database import db_client
+from main import app
+
+
+def make_rows(count: int, category_id: int):
+    return [
+        {
+            "date": date.today().isoformat(),
+            "type": "Expense",
+            "amount": 10 + i % 90,
+            "category_id": category_id,
+            "user_id": 0,
+            "comment": f"benchmark {i}",
+        }
+        for i in range(count)
+    ]
+
+
+async def run(rows: int, batch_size: int):
+    db_client.engine.echo = db_client.async_engine.echo = False
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        credentials = {"username": f"bench-{uuid.uuid4().hex[:8]}", "password": "bench"}
+        await client.post("/api/users/", json=credentials)
+        token = (await client.post("/api/users/auth", data=credentials)).json()
+        client.headers["Authorization"] = f"Bearer {token['access_token']}"
+        category_id = 1
+        payload = make_rows(rows, category_id)
+
+        start = time.perf_counter()
+        for row in payload:
+            response = await client.post("/api/transactions/", json=row)
+            response.raise_for_status()
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for offset in range(0, rows, batch_size):
+            response = await client.post(
+                "/api/transactions/batch", json=payload[offset : offset + batch_size]
+            )
+            response.raise_for_status()
+        batch = time.perf_counter() - start
+
+    print(f"single: {rows} rows in {single:.2f}s ({rows / single:,.0f} rows/s)")
+    print(f"batch:  {rows} rows in {batch:.2f}s ({rows / batch:,.0f} rows/s)")
+    print(f"speedup: {single / batch:.1f}x")
+
+
+def main():
+    """Parse arguments and run both insert paths"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.batch_size))
+    return 0
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Load-test the chat websocket with N concurrent clients.
+
+Each client signs up a throwaway user, opens /ws with its cookie and sends
+its messages one after another, timing each from send until the reply is
+marked complete. /api/chat/stats is polled meanwhile for pool usage, with
+the server's METRICS_TOKEN (without one the stats are skipped). Start the
+server against a migrated, seeded database with the offline model:
+
+    METRICS_TOKEN=bench LLM_BACKEND=local LOCAL_LLM_LATENCY_MS=300 uvicorn main:app
+    python -m benchmarks.chat_load --clients 50 --messages 5 --metrics-token bench
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import uuid
+
+import httpx
+import websockets
+
+SIGN_UP_CONCURRENCY = 8
+MESSAGES = [
+    "spent 250 on groceries yesterday",
+    "hello there",
+    "how much did I spend this month",
+    "paid 400 to ravi for the plumber",
+]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def sign_up(client: httpx.AsyncClient, limit: asyncio.Semaphore) -> str:
+    # Bounded, since the server refuses password hashes past its queue limit
+    async with limit:
+        credentials = {"username": f"load-{uuid.uuid4().hex[:10]}", "password": "load"}
+        (await client.post("/api/users/", json=credentials)).raise_for_status()
+        response = await client.post("/api/users/auth", data=credentials)
+        response.raise_for_status()
+        return response.json()["access_token"]
+
+
+async def run_client(ws_url: str, token: str, messages: int, latencies: list):
+    headers = {"Cookie": f'access_token="Bearer {token}"'}
+    async with websockets.connect(ws_url, additional_headers=headers) as ws:
+        for number in range(messages):
+            started = time.perf_counter()
+            await ws.send(json.dumps({"message": MESSAGES[number % len(MESSAGES)]}))
+            while 'data-complete="true"' not in await ws.recv():
+                pass
+            latencies.append(time.perf_counter() - started)
+
+
+async def poll_stats(client: httpx.AsyncClient, token, samples: list, done):
+    if not token:
+        return
+    headers = {"Authorization": f"Bearer {token}"}
+    while not done.is_set():
+        response = await client.get("/api/chat/stats", headers=headers)
+        if response.status_code == 200:
+            samples.append(response.json())
+        await asyncio.sleep(0.2)
+
+
+async def run(url: str, clients: int, messages: int, metrics_token=None):
+    ws_url = url.replace("http", "ws", 1).rstrip("/") + "/ws"
+    latencies, samples, done = [], [], asyncio.Event()
+    limits = httpx.Limits(max_connections=clients + 2)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        # Sign everyone up first so password hashing is not part of the run
+        limit = asyncio.Semaphore(SIGN_UP_CONCURRENCY)
+        tokens = await asyncio.gather(*(sign_up(client, limit) for _ in range(clients)))
+        monitor = asyncio.create_task(poll_stats(client, metrics_token, samples, done))
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(run_client(ws_url, token, messages, latencies) for token in tokens),
+            return_exceptions=True,
+        )
+        elapsed = time.perf_counter() - started
+        done.set()
+        await monitor
+
+    errors = [result for result in results if isinstance(result, Exception)]
+    print(f"clients: {clients}, messages each: {messages}, errors: {len(errors)}")
+    for error in errors[:5]:
+        print(f"  {type(error).__name__}: {error}")
+    if latencies:
+        print(
+            f"replies: {len(latencies)} in {elapsed:.2f}s "
+            f"({len(latencies) / elapsed:.1f}/s)"
+        )
+        print(
+            "latency  p50 {:.0f}ms  p95 {:.0f}ms  p99 {:.0f}ms  max {:.0f}ms  "
+            "mean {:.0f}ms".format(
+                percentile(latencies, 50) * 1000,
+                percentile(latencies, 95) * 1000,
+                percentile(latencies, 99) * 1000,
+                max(latencies) * 1000,
+                statistics.mean(latencies) * 1000,
+            )
+        )
+    if samples:
+        pool = [sample["db_pool"] for sample in samples]
+        size = pool[-1].get("size")
+        peak = max(p.get("checkedout", 0) for p in pool)
+        print(
+            f"db pool ({pool[-1]['pool']}): peak checked out {peak}"
+            + (
+                f" of {size} (+ overflow {max(p['overflow'] for p in pool)})"
+                if size
+                else ""
+            )
+        )
+        print(
+            f"chat: peak connections {max(s['connections'] for s in samples)}, "
+            f"peak in flight {max(s['in_flight'] for s in samples)}, "
+            f"peak queued {max(s['queued'] for s in samples)}"
+        )
+        last = samples[-1]
+        print(
+            f"fast path hit rate {last['fast_path']['hit_rate']:.0%}, "
+            f"summary cache hit ratio {last['summary_cache']['hit_ratio']:.0%}"
+        )
+    return 1 if errors else 0
+
+
+def main():
+    """Parse arguments and drive the clients"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=4)
+    parser.add_argument("--metrics-token")
+    args = parser.parse_args()
+    return asyncio.run(run(args.url, args.clients, args.messages, args.metrics_token))
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the main routes, with a JSON report.
+
+Runs in-process against main.app through httpx's ASGI transport, using the
+configured database. Point it at a database filled by generate_data.py so
+the numbers reflect realistic histories; the benchmark logs in as the
+generated users (signing up throwaway users if there are none). Each
+scenario sends --requests requests from --concurrency clients and records
+latency percentiles, errors and the SQL count and time from Server-Timing.
+
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --compare bench.json   # non-zero on regression
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import date, datetime, timezone
+
+import httpx
+
+from benchmarks.chat_load import percentile
+from database import db_client
+from main import app
+
+SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+class Client:
+    """One benchmark user: an ASGI client carrying its bearer token and cookie"""
+
+    def __init__(self, http: httpx.AsyncClient, username: str, token: str):
+        self.http, self.username, self.token = http, username, token
+        self.headers = {
+            "Authorization": f"Bearer {token}",
+            "Cookie": f'access_token="Bearer {token}"',
+        }
+
+    def get(self, url: str, **kwargs):
+        return self.http.get(url, headers=self.headers, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.http.post(url, headers=self.headers, **kwargs)
+
+
+def login(client: Client, number: int, password: str):
+    return client.http.post(
+        "/api/users/auth", data={"username": client.username, "password": password}
+    )
+
+
+def transactions_page(client: Client, number: int, password: str):
+    return client.get("/transactions")
+
+
+def filter_transactions(client: Client, number: int, password: str):
+    return client.post(
+        "/transactions/filter", data={"type": ("Expense", "Income")[number % 2]}
+    )
+
+
+def insert_transaction(client: Client, number: int, password: str):
+    return client.post(
+        "/transactions/insert",
+        data={
+            "date": date.today().isoformat(),
+            "in_or_exp": "Expense",
+            "amount": 10 + number % 90,
+            "category": 1,
+            "comments": f"benchmark {number}",
+        },
+    )
+
+
+def api_transactions(client: Client, number: int, password: str):
+    return client.get("/api/transactions/")
+
+
+def api_total(client: Client, number: int, password: str):
+    return client.get(f"/api/transactions/total/{('Expense', 'Income')[number % 2]}")
+
+
+# name -> (request function, share of --requests it sends)
+SCENARIOS = {
+    "login": (login, 0.1),
+    "transactions_page": (transactions_page, 1),
+    "transactions_filter": (filter_transactions, 1),
+    "transactions_insert": (insert_transaction, 1),
+    "api_transactions": (api_transactions, 1),
+    "api_total": (api_total, 1),
+}
+
+
+async def sign_in(http: httpx.AsyncClient, username: str, password: str):
+    response = await http.post(
+        "/api/users/auth", data={"username": username, "password": password}
+    )
+    if response.status_code != 200:
+        return None
+    return Client(http, username, response.json()["access_token"])
+
+
+async def create_clients(http, count: int, prefix: str, password: str):
+    """Log in as generated users, or sign up throwaway ones"""
+    clients = []
+    for number in range(count):
+        client = await sign_in(http, f"{prefix}-{number:06d}", password)
+        if client is None:
+            username = f"bench-{uuid.uuid4().hex[:8]}"
+            credentials = {"username": username, "password": password}
+            (await http.post("/api/users/", json=credentials)).raise_for_status()
+            client = await sign_in(http, username, password)
+        clients.append(client)
+    return clients
+
+
+async def run_scenario(clients: list[Client], send, requests: int, password: str):
+    latencies, db_ms, queries, statuses = [], [], [], {}
+    numbers = iter(range(requests))
+
+    async def worker(client: Client):
+        for number in numbers:
+            started = time.perf_counter()
+            response = await send(client, number, password)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            timing = SERVER_TIMING_DB.search(response.headers.get("server-timing", ""))
+            if timing:
+                db_ms.append(float(timing.group(1)))
+                queries.append(int(timing.group(2)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(client) for client in clients))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": sum(count for code, count in statuses.items() if code >= 400),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+        "db_ms_mean": round(statistics.mean(db_ms), 2) if db_ms else None,
+        "queries_mean": round(statistics.mean(queries), 2) if queries else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    db_client.engine.echo = db_client.async_engine.echo = False
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=60
+    ) as http:
+        clients = await create_clients(
+            http, args.concurrency, args.prefix, args.password
+        )
+        results = {}
+        for name, (send, share) in SCENARIOS.items():
+            if args.only and name not in args.only:
+                continue
+            requests = max(1, int(args.requests * share))
+            # Warm caches and connections so the first scenario is not penalised
+            await send(clients[0], 0, args.password)
+            results[name] = await run_scenario(clients, send, requests, args.password)
+            print(
+                f"{name:22} p50 {results[name]['p50_ms']:8.1f}ms  "
+                f"p95 {results[name]['p95_ms']:8.1f}ms  "
+                f"{results[name]['throughput_rps']:8.1f} req/s  "
+                f"errors {results[name]['errors']}"
+            )
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "database": db_client.async_engine.dialect.name,
+        "settings": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "users": [client.username for client in clients],
+        },
+        "scenarios": results,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Scenarios whose p95 grew by more than tolerance over the baseline"""
+    regressions = []
+    print(f"\ncompared with {baseline.get('commit')} ({baseline.get('created_at')}):")
+    for name, result in report["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        change = result["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0
+        flag = ""
+        if change > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:22} p95 {before['p95_ms']:8.1f}ms -> {result['p95_ms']:8.1f}ms "
+            f"({change:+.0%}){flag}"
+        )
+    return regressions
+
+
+def main():
+    """Parse arguments, run the scenarios and write or compare the report"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--prefix", default="synthetic")
+    parser.add_argument("--password", default="synthetic")
+    parser.add_argument("--only", nargs="*", choices=list(SCENARIOS))
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report to compare with")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed p95 growth (0.2 = 20%%)"
+    )
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} scenario(s) regressed: {', '.join(regressions)}")
+            return 1
+    errors = sum(result["errors"] for result in report["scenarios"].values())
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Check that chat replies stream in pieces.
+
+Drives stream_message with the offline model from app/services/local_model.py
+for a conversational message and a summary request, and fails unless each
+reply arrives as several growing chunks that end in the complete text. The
+model's latency and chunk count are pinned here rather than read from
+LOCAL_LLM_*, so chunks always arrive further apart than the stream debounce.
+Needs no API key; run it against a migrated, seeded database.
+"""
+
+import asyncio
+import sys
+from database.db_client import AsyncSessionLocal
+from app.services import local_model
+from app.services.pydantic_ai_chat_service import (
+    STREAM_DEBOUNCE_SECONDS,
+    agent_registry,
+    stream_message,
+)
+
+USER_ID = 0
+MIN_CHUNKS = 3
+CHUNK_COUNT = 5
+# Twice the debounce between chunks, so they are never merged
+LATENCY_MS = int(STREAM_DEBOUNCE_SECONDS * 1000 * 2 * CHUNK_COUNT)
+MESSAGES = [
+    ("hello there", local_model.SCRIPT["ConversationalResponse"]["response"]),
+    ("show me a summary of last 30 days", local_model.SCRIPT["summary"]),
+]
+
+
+async def collect(message: str) -> list[str]:
+    async with AsyncSessionLocal() as db:
+        return [chunk async for chunk in stream_message(message, USER_ID, db)]
+
+
+async def run() -> int:
+    agent_registry.model = local_model.create_local_model(LATENCY_MS, CHUNK_COUNT)
+    failures = 0
+    for message, expected in MESSAGES:
+        chunks = await collect(message)
+        problems = []
+        if len(chunks) < MIN_CHUNKS:
+            problems.append(f"only {len(chunks)} chunk(s)")
+        if any(not b.startswith(a) or a == b for a, b in zip(chunks, chunks[1:])):
+            problems.append("chunks do not grow")
+        if not chunks or chunks[-1] != expected:
+            problems.append(f"final reply {chunks[-1:]!r} != {expected!r}")
+        failures += bool(problems)
+        print(
+            f"[{'MISMATCH' if problems else 'ok'}] {message!r}: {len(chunks)} chunks, "
+            f"lengths {[len(chunk) for chunk in chunks]}"
+        )
+        for problem in problems:
+            print(f"    {problem}")
+    return 1 if failures else 0
+
+
+def main():
+    """Stream each message and report replies that did not stream"""
+    return asyncio.run(run())
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
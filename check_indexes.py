@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Check that the transaction queries are served by the composite indexes.
+
+Runs EXPLAIN for the queries issued by the transaction pages, the JSON API,
+the dashboard and the chat summary, built by the same functions the app
+calls, and fails if a plan does not mention the index expected for that
+access path. Run it against a migrated database.
+"""
+
+import sys
+from datetime import date, timedelta
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql, sqlite
+from app import pagination
+from app.routers.pages import user_transactions_query
+from app.services.dashboard_analytics import dashboard_query
+from app.services.summary_digest import digest_queries
+from database import rollups
+from database.db_client import engine
+from database.models import Transactions, Type
+
+USER_ID = 1
+CATEGORY_ID = 1
+TODAY = date.today()
+CUT_OFF_DATE = TODAY - timedelta(days=30)
+PREVIOUS_CUT_OFF_DATE = CUT_OFF_DATE - timedelta(days=30)
+# transaction_totals is read through its primary key
+TOTALS_INDEX = {
+    "postgresql": "transaction_totals_pkey",
+    "sqlite": "sqlite_autoindex_transaction_totals_1",
+}
+
+
+def checks(dialect_name: str):
+    """(name, query, expected index) built with the code the app runs"""
+    cursor = pagination.encode_cursor(Transactions(date=CUT_OFF_DATE, id=1000))
+
+    def page(query, cursor=None):
+        return pagination.page_query(query, cursor, pagination.PAGE_SIZE)
+
+    def digest(**filters):
+        per_category, top = digest_queries(
+            USER_ID, CUT_OFF_DATE, PREVIOUS_CUT_OFF_DATE, **filters
+        )
+        return [("totals", per_category), ("top descriptions", top)]
+
+    found = [
+        (
+            "/transactions, GET /api/transactions/",
+            page(user_transactions_query(USER_ID)),
+            "ix_transactions_user_date_id",
+        ),
+        (
+            "/transactions/page (cursor)",
+            page(user_transactions_query(USER_ID), cursor),
+            "ix_transactions_user_date_id",
+        ),
+        (
+            "/transactions/filter",
+            page(user_transactions_query(USER_ID, Type.Expense.value)),
+            "ix_transactions_user_type_date_id",
+        ),
+        (
+            "/api/transactions/total/{type}",
+            rollups.total_query(USER_ID, Type.Expense),
+            TOTALS_INDEX[dialect_name],
+        ),
+        (
+            "/api/transactions/total/{type}?month=",
+            rollups.total_query(USER_ID, Type.Expense, CUT_OFF_DATE),
+            TOTALS_INDEX[dialect_name],
+        ),
+        (
+            "/api/dashboard/",
+            dashboard_query(dialect_name, USER_ID, PREVIOUS_CUT_OFF_DATE, TODAY),
+            "ix_transactions_user_date_id",
+        ),
+    ]
+    for label, filters, index_name in [
+        ("", {}, "ix_transactions_user_date_id"),
+        (
+            " by type",
+            {"type_filter": Type.Expense},
+            "ix_transactions_user_type_date_id",
+        ),
+        (
+            " by category",
+            {"category_id": CATEGORY_ID},
+            "ix_transactions_user_category_date",
+        ),
+    ]:
+        for part, query in digest(**filters):
+            found.append((f"chat summary{label} ({part})", query, index_name))
+    return found
+
+
+def explain(connection, query):
+    if connection.dialect.name == "sqlite":
+        sql = query.compile(
+            dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}
+        )
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        return "\n".join(row[-1] for row in rows)
+
+    # Small tables are cheaper to scan sequentially; only index usability
+    # matters here, not the planner's choice for the current row count.
+    connection.execute(text("SET LOCAL enable_seqscan = off"))
+    sql = query.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    rows = connection.execute(text(f"EXPLAIN {sql}")).all()
+    return "\n".join(row[0] for row in rows)
+
+
+def main():
+    """Explain every query and report which ones miss their index"""
+    engine.echo = False
+    failures = 0
+    with engine.begin() as connection:
+        for name, query, index_name in checks(connection.dialect.name):
+            plan = explain(connection, query)
+            used = index_name in plan
+            failures += not used
+            print(f"[{'ok' if used else 'MISSING'}] {name} -> {index_name}")
+            if not used:
+                print(plan)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Check the rule-based transaction parser against a corpus of chat messages.
+
+Every message is parsed with the seeded categories; a message is expected
+either to produce the given fields or to be left to the LLM (None). Reports
+mismatches, the share of the corpus handled locally and the mean parse time.
+Run it against a seeded database.
+"""
+
+import sys
+import time
+from datetime import date
+from database.db_client import SessionLocal, engine
+from database.models import Category
+from app.services.category_catalog import CategoryEntry, CategorySnapshot
+from app.services.transaction_rules import parse_transaction
+
+TODAY = date(2025, 1, 15)  # a Wednesday
+
+
+def expense(amount, category, description, day=15):
+    return (amount, category, description, "Expense", date(2025, 1, day))
+
+
+def income(amount, category, description, day=15):
+    return (amount, category, description, "Income", date(2025, 1, day))
+
+
+CORPUS = [
+    ("spent 250 on groceries yesterday", expense(250, "Groceries", "groceries", 14)),
+    ("got salary 50000", income(50000, "Salary", "salary")),
+    (
+        "paid 1,200 electricity bill",
+        expense(1200, "Bills & Utilities", "electricity bill"),
+    ),
+    ("₹80 coffee", expense(80, "Food & Dining", "coffee")),
+    ("Rs. 450 for uber today", expense(450, "Transportation", "uber")),
+    ("petrol 2000", expense(2000, "Fuel", "petrol")),
+    ("received 15k freelance payment", income(15000, "Freelance", "freelance payment")),
+    ("dinner 1250.50 last friday", expense(1250.5, "Food & Dining", "dinner", 10)),
+    (
+        "bought medicines for 340 3 days ago",
+        expense(340, "Healthcare & Medical", "medicines", 12),
+    ),
+    ("netflix 649 on monday", expense(649, "Subscriptions", "netflix", 13)),
+    ("refund of 999 from amazon", income(999, "Refund", "amazon")),
+    ("credited 2 lakh salary", income(200000, "Salary", "salary")),
+    (
+        "spent 300 rs on movie day before yesterday",
+        expense(300, "Entertainment", "movie", 13),
+    ),
+    (
+        "paid 5000 credit card bill on 2025-01-02",
+        expense(5000, "Credit Card Bill", "credit card bill", 2),
+    ),
+    ("home loan emi 25000", None),
+    ("spent 250 on groceries and 100 on fuel", None),
+    ("how much did I spend on groceries?", None),
+    ("show me a summary of last 30 days", None),
+    ("spent 500", None),
+    ("paid 400 to ravi", None),
+    ("I will pay 800 for rent tomorrow", None),
+    ("got groceries for 200", None),
+    ("didn't spend 200 on coffee", None),
+    ("hello", None),
+    ("what is my total income this month", None),
+    ("amazon prime 1499", None),
+    ("spent 500 on groceries last month", None),
+    ("paid 200 for uber on 3rd jan", None),
+    ("spent 300 on fuel last week", None),
+    ("spent 100 on coffee in december", None),
+    ("paid 150 for lunch on 12", None),
+    ("petrol 900 yesterday and last week", None),
+]
+
+
+def load_categories():
+    with SessionLocal() as session:
+        rows = session.query(Category).order_by(Category.id).all()
+        return CategorySnapshot([CategoryEntry(c.id, c.name, c.type) for c in rows], 0)
+
+
+def main():
+    """Parse the corpus and report any message parsed differently"""
+    engine.echo = False
+    categories = load_categories()
+    failures, hits = 0, 0
+    started = time.perf_counter()
+    for message, expected in CORPUS:
+        parsed = parse_transaction(message, categories, today=TODAY)
+        hits += parsed is not None
+        got = parsed and (
+            parsed["amount"],
+            parsed["category"],
+            parsed["description"],
+            parsed["transaction_type"],
+            parsed["transaction_date"],
+        )
+        ok = got == expected
+        failures += not ok
+        print(f"[{'ok' if ok else 'MISMATCH'}] {message!r} -> {got}")
+        if not ok:
+            print(f"    expected {expected}")
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"\n{hits}/{len(CORPUS)} handled locally, "
+        f"{elapsed / len(CORPUS) * 1e6:.0f}µs per message"
+    )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
@@ -26,9 +26,102 @@ def get_database_url():
     return f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
 
 
+def get_async_database_url(database_url: str, env_name: str = "ASYNC_DATABASE_URL"):
+    """Get async driver URL, derived from the sync URL unless set explicitly"""
+
+    async_database_url = os.getenv(env_name)
+    if async_database_url:
+        return async_database_url
+
+    for sync_prefix, async_prefix in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if database_url.startswith(sync_prefix):
+            return async_prefix + database_url[len(sync_prefix) :]
+    return database_url
+
+
+def get_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 DATABASE_URL = get_database_url()
+ASYNC_DATABASE_URL = get_async_database_url(DATABASE_URL)
+
+# Optional read-only replica for read-heavy routes. For READ_YOUR_WRITES_SECONDS
+# after a user's own write, their reads stay on the primary so they never
+# see a replica that has not caught up yet.
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+ASYNC_READ_DATABASE_URL = (
+    get_async_database_url(READ_DATABASE_URL, "ASYNC_READ_DATABASE_URL")
+    if READ_DATABASE_URL
+    else None
+)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+
+# Connection pool, applied to server databases (ignored for SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = get_flag("DB_POOL_PRE_PING", True)
+# Per-statement limit on Postgres; 0 disables. Migrations get their own
+# limit, off by default, so long index builds are not cut short.
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))
+DB_MIGRATION_STATEMENT_TIMEOUT_MS = int(
+    os.getenv("DB_MIGRATION_STATEMENT_TIMEOUT_MS", 0)
+)
+# WARNING logs no statements, INFO every statement, DEBUG statements and rows
+SQL_LOG_LEVEL = os.getenv("SQL_LOG_LEVEL", "WARNING").upper()
+# Statements slower than this are logged at WARNING whatever SQL_LOG_LEVEL
+# says; 0 disables
+SLOW_QUERY_MS = int(os.getenv("SLOW_QUERY_MS", 500))
+# Level of the per-request JSON lines (app.requests) and slow query warnings
+# (database.slow_queries); INFO logs every request, WARNING only problems
+APP_LOG_LEVEL = os.getenv("APP_LOG_LEVEL", "INFO").upper()
+# logging.config.dictConfig schema applied by main.py; the app's loggers get
+# their own stderr handler instead of relying on uvicorn's configuration
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "app": {"format": "%(asctime)s %(levelname)s %(name)s: %(message)s"},
+    },
+    "handlers": {
+        "app": {"class": "logging.StreamHandler", "formatter": "app"},
+    },
+    "loggers": {
+        name: {"handlers": ["app"], "level": APP_LOG_LEVEL, "propagate": False}
+        for name in ("app.requests", "database.slow_queries")
+    },
+}
+# A statement run more often than this in one request is logged as a likely
+# N+1 query
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 10))
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 GEMINI_KEY = os.getenv("GOOGLE_API_KEY")
+# "gemini", or "local" for the offline stand-in in app/services/local_model.py
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+LOCAL_LLM_LATENCY_MS = int(os.getenv("LOCAL_LLM_LATENCY_MS", 500))
+LOCAL_LLM_CHUNKS = int(os.getenv("LOCAL_LLM_CHUNKS", 10))
+LOCAL_LLM_SCRIPT = os.getenv("LOCAL_LLM_SCRIPT")
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", 300))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", 32))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", 1000))
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", 1024))
+DASHBOARD_CACHE_SIZE = int(os.getenv("DASHBOARD_CACHE_SIZE", 1024))
+CHAT_QUEUE_SIZE = int(os.getenv("CHAT_QUEUE_SIZE", 4))
+# Bearer token for /metrics and /api/chat/stats; both answer 403 while unset
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
@@ -0,0 +1,82 @@
+"""
+Per-user data versions.
+
+A user's version is bumped after each commit that changed their
+transactions, so caches of derived results can include it in their keys
+and never serve anything older than the last committed write. The time of
+that commit is kept too, so reads can stay on the primary database for a
+while after a user's own write (see db_client.ReadRoutingSession).
+
+Changes are noted in rollups.apply_deltas, which every transaction write
+path goes through, on the info dict of the connection that made them. A
+session remembers the connections it began transactions on and bumps the
+noted users once it commits, or drops them when it rolls back.
+"""
+
+import threading
+import time
+from typing import Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config import READ_YOUR_WRITES_SECONDS
+
+PENDING = "changed_user_ids"
+
+versions: dict[int, int] = {}
+last_write: dict[int, float] = {}
+versions_lock = threading.Lock()
+
+
+def get(user_id: int) -> int:
+    return versions.get(user_id, 0)
+
+
+def bump(user_ids: Iterable[int]):
+    now = time.monotonic()
+    with versions_lock:
+        for user_id in user_ids:
+            versions[user_id] = versions.get(user_id, 0) + 1
+            last_write[user_id] = now
+
+
+def wrote_recently(
+    user_id: Optional[int], window: float = READ_YOUR_WRITES_SECONDS
+) -> bool:
+    """Whether the user committed a change within the last window seconds"""
+    written = last_write.get(user_id)
+    if written is None:
+        return False
+    if time.monotonic() - written < window:
+        return True
+    with versions_lock:
+        if last_write.get(user_id) == written:
+            del last_write[user_id]
+    return False
+
+
+def note_changes(connection, user_ids: Iterable[int]):
+    connection.info.setdefault(PENDING, set()).update(user_ids)
+
+
+def pending_changes(session: Session) -> set[int]:
+    user_ids = set()
+    for info in session.info.pop("connection_infos", []):
+        user_ids |= info.pop(PENDING, set())
+    return user_ids
+
+
+@event.listens_for(Session, "after_begin")
+def track_connection(session: Session, transaction, connection):
+    session.info.setdefault("connection_infos", []).append(connection.info)
+
+
+@event.listens_for(Session, "after_commit")
+def publish_changes(session: Session):
+    bump(pending_changes(session))
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_changes(session: Session):
+    pending_changes(session)
@@ -1,17 +1,163 @@
-from sqlalchemy import create_engine
+import logging
+import time
+from typing import Optional
+from fastapi.requests import HTTPConnection
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from config import DATABASE_URL
-
-engine = create_engine(
+from sqlalchemy.orm import Session, sessionmaker
+from database import data_versions, query_stats
+from config import (
     DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
-    echo=True,
+    ASYNC_DATABASE_URL,
+    ASYNC_READ_DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS,
+    SQL_LOG_LEVEL,
+    SLOW_QUERY_MS,
 )
 
+slow_query_logger = logging.getLogger("database.slow_queries")
+
+
+def engine_options(
+    url: str, pooled: bool = True, statement_timeout_ms: int = DB_STATEMENT_TIMEOUT_MS
+) -> dict:
+    """create_engine keyword arguments for url from the DB_* settings"""
+    driver = make_url(url).drivername
+    options = {
+        "echo": {"DEBUG": "debug", "INFO": True}.get(SQL_LOG_LEVEL, False),
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if driver.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+        return options
+
+    if pooled:
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    if statement_timeout_ms and driver.startswith("postgresql"):
+        if "asyncpg" in driver:
+            options["connect_args"] = {
+                "server_settings": {"statement_timeout": str(statement_timeout_ms)}
+            }
+        else:
+            options["connect_args"] = {
+                "options": f"-c statement_timeout={statement_timeout_ms}"
+            }
+    return options
+
+
+def log_slow_queries(bind, threshold_ms: int = SLOW_QUERY_MS):
+    """Log statements on bind (a sync Engine) that take threshold_ms or more"""
+    if not threshold_ms:
+        return
+
+    @event.listens_for(bind, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+    @event.listens_for(bind, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start_times"].pop()) * 1000
+        if elapsed_ms >= threshold_ms:
+            slow_query_logger.warning("Slow query (%.0f ms): %s", elapsed_ms, statement)
+
+    @event.listens_for(bind, "handle_error")
+    def drop_timer(context):
+        if context.connection is not None:
+            started = context.connection.info.get("query_start_times")
+            if started:
+                started.pop()
+
+
+def create_db_engine(
+    url: str = DATABASE_URL,
+    pooled: bool = True,
+    statement_timeout_ms: int = DB_STATEMENT_TIMEOUT_MS,
+    **overrides,
+):
+    options = engine_options(url, pooled, statement_timeout_ms)
+    engine = create_engine(url, **{**options, **overrides})
+    log_slow_queries(engine)
+    query_stats.install(engine)
+    return engine
+
+
+engine = create_db_engine()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL)
+)
+log_slow_queries(async_engine.sync_engine)
+query_stats.install(async_engine.sync_engine)
+
+# expire_on_commit=False keeps loaded attributes usable after commit, since
+# lazy refreshes are not possible from template rendering on an AsyncSession.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+read_async_engine = (
+    create_async_engine(
+        ASYNC_READ_DATABASE_URL, **engine_options(ASYNC_READ_DATABASE_URL)
+    )
+    if ASYNC_READ_DATABASE_URL
+    else None
+)
+if read_async_engine is not None:
+    log_slow_queries(read_async_engine.sync_engine)
+    query_stats.install(read_async_engine.sync_engine)
+
+
+class ReadRoutingSession(Session):
+    """Session that reads from the replica when one is configured.
+
+    Flushes, sessions marked info["primary"] and users who committed a
+    change within READ_YOUR_WRITES_SECONDS go to the primary. The user comes
+    from info["user_id"], or from the request state oauth2 fills in, which is
+    only known once the route's user dependency has run; the engine is
+    therefore chosen per statement rather than when the session is opened.
+    """
+
+    def user_id(self) -> Optional[int]:
+        if "user_id" in self.info:
+            return self.info["user_id"]
+        connection = self.info.get("connection")
+        return getattr(connection.state, "user_id", None) if connection else None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            read_async_engine is None
+            or self._flushing
+            or self.info.get("primary")
+            or data_versions.wrote_recently(self.user_id())
+        ):
+            return async_engine.sync_engine
+        return read_async_engine.sync_engine
+
+
+ReadSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=ReadRoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 
 def get_db():
     db = SessionLocal()
@@ -19,3 +165,32 @@ def get_db():
         yield db  # Use yield instead of return for proper session handling
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def read_session(user_id: Optional[int] = None) -> AsyncSession:
+    """Session for read-only work on behalf of user_id; see ReadRoutingSession"""
+    db = ReadSessionLocal()
+    db.info["user_id"] = user_id
+    return db
+
+
+async def get_read_db(connection: HTTPConnection):
+    """get_async_db for read-only routes, served by the replica if configured"""
+    async with ReadSessionLocal() as db:
+        db.info["connection"] = connection
+        yield db
+
+
+def pool_usage(bind=async_engine) -> dict:
+    """Connection counts for an engine's pool, for monitoring"""
+    pool = bind.pool
+    usage = {"pool": type(pool).__name__}
+    for name in ("size", "checkedout", "checkedin", "overflow"):
+        if hasattr(pool, name):
+            usage[name] = getattr(pool, name)()
+    return usage
@@ -1,8 +1,14 @@
 import enum
 import sqlalchemy as sa
-from sqlalchemy.orm import Mapped, relationship
+from sqlalchemy.orm import Mapped, relationship, validates
 from database.db_client import Base, engine
 from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+
+
+def money(value) -> Decimal:
+    """Round to cents as Postgres stores Numeric(_, 2): halves away from zero"""
+    return Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
 
 class Type(enum.Enum):
@@ -42,3 +48,49 @@ class Transactions(Base):
     type = sa.Column(sa.Enum(Type), nullable=False)
     comment = sa.Column(sa.String)
     date = sa.Column(sa.Date, nullable=False, default=date.today)
+
+    @validates("amount")
+    def round_amount(self, key, value):
+        # Rounded before the flush so the rollup delta and the stored row agree
+        return value if value is None else money(value)
+
+
+class TransactionTotals(Base):
+    """Per-user, per-type, per-month rollup of transactions.
+
+    Kept in step with the transactions table by database.rollups.
+    """
+
+    __tablename__ = "transaction_totals"
+
+    user_id = sa.Column(
+        sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    type = sa.Column(sa.Enum(Type), primary_key=True)
+    month = sa.Column(sa.Date, primary_key=True)
+    total = sa.Column(sa.Numeric(14, 2), nullable=False, default=0)
+    count = sa.Column(sa.Integer, nullable=False, default=0)
+
+
+# Composite indexes for the transaction access paths: every query is scoped
+# to one user and either pages newest-first, narrows by type, or by category.
+sa.Index(
+    "ix_transactions_user_date_id",
+    Transactions.user_id,
+    Transactions.date.desc(),
+    Transactions.id.desc(),
+)
+sa.Index(
+    "ix_transactions_user_type_date_id",
+    Transactions.user_id,
+    Transactions.type,
+    Transactions.date.desc(),
+    Transactions.id.desc(),
+    postgresql_include=["amount"],
+)
+sa.Index(
+    "ix_transactions_user_category_date",
+    Transactions.user_id,
+    Transactions.category_id,
+    Transactions.date,
+)
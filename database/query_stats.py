@@ -0,0 +1,73 @@
+"""
+Per-request SQL statistics.
+
+install() hooks an engine so that every statement executed while a
+QueryStats is active (see collect()) is counted and timed, and grouped by
+statement text to spot N+1 patterns: the same statement run more than
+N_PLUS_ONE_THRESHOLD times in one unit of work, typically a lazy load or a
+per-row query inside a loop. The HTTP middleware in main.py collects one
+QueryStats per request.
+"""
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+
+from config import N_PLUS_ONE_THRESHOLD
+
+current_stats: ContextVar[Optional["QueryStats"]] = ContextVar(
+    "query_stats", default=None
+)
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration_ms = 0.0
+        self.statements = Counter()
+
+    def record(self, statement: str, elapsed_ms: float):
+        self.count += 1
+        self.duration_ms += elapsed_ms
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        """Statements executed more than threshold times, most frequent first"""
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count > threshold
+        ]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration_ms:.1f};desc="{self.count} queries"'
+
+
+@contextmanager
+def collect() -> Iterator[QueryStats]:
+    stats = QueryStats()
+    token = current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_stats.reset(token)
+
+
+def install(bind):
+    """Record statements on bind (a sync Engine) into the active QueryStats"""
+
+    @event.listens_for(bind, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and current_stats.get() is not None:
+            context.stats_started = time.perf_counter()
+
+    @event.listens_for(bind, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        stats = current_stats.get()
+        started = getattr(context, "stats_started", None)
+        if stats is not None and started is not None:
+            stats.record(statement, (time.perf_counter() - started) * 1000)
@@ -0,0 +1,200 @@
+"""
+Per-user, per-type, per-month transaction totals.
+
+Every ORM flush that inserts, updates or deletes a Transactions row applies
+the matching delta to transaction_totals on the same connection, so the
+rollup commits or rolls back together with the change. Writes that bypass
+the ORM unit of work (Core inserts, bulk statements) must call
+apply_deltas themselves.
+"""
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, event, func, inspect, literal_column, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from database import data_versions
+from database.models import TransactionTotals, Transactions, Type, money
+
+Key = tuple[int, Type, date]
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def month_start_sql(column, dialect_name: str):
+    # Inline the unit so SELECT and GROUP BY render the same expression;
+    # Postgres rejects the grouping when each side gets its own bind param.
+    if dialect_name == "sqlite":
+        return func.date(column, literal_column("'start of month'"))
+    return func.date_trunc(literal_column("'month'"), column).cast(
+        TransactionTotals.month.type
+    )
+
+
+def row_key(user_id, type, value: date) -> Key:
+    return int(user_id), Type(type), month_start(value)
+
+
+def add_delta(deltas: dict, key: Key, amount, count: int):
+    total, rows = deltas[key]
+    deltas[key] = (total + money(amount) * count, rows + count)
+
+
+def collect_deltas(session: Session) -> dict[Key, tuple[Decimal, int]]:
+    """Net change in (total, count) per rollup key for the pending flush"""
+    deltas = defaultdict(lambda: (Decimal("0"), 0))
+
+    for obj in session.new:
+        if isinstance(obj, Transactions):
+            key = row_key(obj.user_id, obj.type, obj.date or date.today())
+            add_delta(deltas, key, obj.amount, 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Transactions):
+            state = inspect(obj)
+            old = {
+                attr: state.attrs[attr].history.deleted or [getattr(obj, attr)]
+                for attr in ("user_id", "type", "date", "amount")
+            }
+            key = row_key(old["user_id"][0], old["type"][0], old["date"][0])
+            add_delta(deltas, key, old["amount"][0], -1)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Transactions) or not session.is_modified(obj):
+            continue
+        state = inspect(obj)
+        histories = {
+            attr: state.attrs[attr].history
+            for attr in ("user_id", "type", "date", "amount")
+        }
+        if not any(history.has_changes() for history in histories.values()):
+            continue
+        old = {
+            attr: (history.deleted or history.unchanged or [getattr(obj, attr)])[0]
+            for attr, history in histories.items()
+        }
+        add_delta(
+            deltas, row_key(old["user_id"], old["type"], old["date"]), old["amount"], -1
+        )
+        add_delta(deltas, row_key(obj.user_id, obj.type, obj.date), obj.amount, 1)
+
+    return {key: delta for key, delta in deltas.items() if delta != (Decimal("0"), 0)}
+
+
+def apply_deltas(connection, deltas: dict[Key, tuple[Decimal, int]]):
+    """Upsert (total, count) deltas into transaction_totals"""
+    if not deltas:
+        return
+    dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+    table = TransactionTotals.__table__
+    stmt = dialect.insert(table).values(
+        [
+            {
+                "user_id": user_id,
+                "type": type,
+                "month": month,
+                "total": total,
+                "count": count,
+            }
+            for (user_id, type, month), (total, count) in deltas.items()
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.type, table.c.month],
+        set_={
+            "total": table.c.total + stmt.excluded.total,
+            "count": table.c.count + stmt.excluded.count,
+        },
+    )
+    connection.execute(stmt)
+    data_versions.note_changes(connection, {user_id for user_id, _, _ in deltas})
+
+
+def deltas_for_rows(rows: Iterable[dict]) -> dict[Key, tuple[Decimal, int]]:
+    """Deltas for freshly inserted transaction rows given as dicts"""
+    deltas = defaultdict(lambda: (Decimal("0"), 0))
+    for row in rows:
+        add_delta(
+            deltas, row_key(row["user_id"], row["type"], row["date"]), row["amount"], 1
+        )
+    return dict(deltas)
+
+
+@event.listens_for(Session, "before_flush")
+def maintain_totals(session: Session, flush_context, instances):
+    apply_deltas(session.connection(), collect_deltas(session))
+
+
+def total_query(user_id: int, type: Type, month: Optional[date] = None):
+    """Sum of a user's transactions of one type, overall or for one month"""
+    query = select(func.sum(TransactionTotals.total)).filter(
+        TransactionTotals.user_id == user_id, TransactionTotals.type == type
+    )
+    if month is not None:
+        query = query.filter(TransactionTotals.month == month_start(month))
+    return query
+
+
+def aggregate_transactions(dialect_name: str):
+    month = month_start_sql(Transactions.date, dialect_name)
+    return select(
+        Transactions.user_id,
+        Transactions.type,
+        month.label("month"),
+        func.sum(Transactions.amount).label("total"),
+        func.count().label("count"),
+    ).group_by(Transactions.user_id, Transactions.type, month)
+
+
+def rebuild_totals(session: Session) -> int:
+    """Recompute transaction_totals from scratch; returns rows written"""
+    dialect_name = session.get_bind().dialect.name
+    session.execute(delete(TransactionTotals))
+    aggregate = aggregate_transactions(dialect_name).subquery()
+    result = session.execute(
+        TransactionTotals.__table__.insert().from_select(
+            ["user_id", "type", "month", "total", "count"],
+            select(
+                aggregate.c.user_id,
+                aggregate.c.type,
+                aggregate.c.month,
+                aggregate.c.total,
+                aggregate.c.count,
+            ),
+        )
+    )
+    return result.rowcount
+
+
+def check_totals(session: Session) -> list[tuple[Key, tuple, tuple]]:
+    """Compare the rollup against a live aggregate; returns mismatches"""
+    dialect_name = session.get_bind().dialect.name
+    expected = {
+        row_key(row.user_id, row.type, to_date(row.month)): (
+            money(row.total),
+            row.count,
+        )
+        for row in session.execute(aggregate_transactions(dialect_name))
+    }
+    stored = {
+        row_key(row.user_id, row.type, row.month): (money(row.total), row.count)
+        for row in session.execute(select(TransactionTotals)).scalars().all()
+        if row.count
+    }
+    return [
+        (key, expected.get(key), stored.get(key))
+        for key in sorted(
+            expected.keys() | stored.keys(), key=lambda k: (k[0], k[1].value, k[2])
+        )
+        if expected.get(key) != stored.get(key)
+    ]
+
+
+def to_date(value) -> date:
+    return date.fromisoformat(value) if isinstance(value, str) else value
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic users with realistic transaction histories
+
+Each user gets a salary, rent and a few subscriptions every month plus
+day-to-day spending drawn from the seeded categories, scaled by a seasonal
+factor (festive months and December spend more). Rows go in with bulk
+Core inserts and the transaction_totals rollup is updated per chunk, so the
+database looks as if the app had written them. Run seed_data.py first.
+
+    python generate_data.py --users 1000 --months 36   # about 1.8M rows
+    python generate_data.py --users 20 --seed 7 --password secret
+
+Users are named <prefix>-000000, <prefix>-000001, ...; every user shares
+the same password. A user's rows are always committed together, and a
+rerun creates the missing users and fills in those that have no
+transactions yet, so an interrupted run is finished by running it again.
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import exists, insert, select
+
+from app.utils import get_password_hash
+from database import rollups
+from database.db_client import create_db_engine
+from database.models import Category, Transactions, Type, User
+
+CHUNK_SIZE = 10000
+
+# Month -> spending multiplier
+SEASONALITY = {
+    1: 0.9,
+    2: 0.9,
+    3: 1.0,
+    4: 1.0,
+    5: 1.1,
+    6: 1.0,
+    7: 0.95,
+    8: 1.0,
+    9: 1.05,
+    10: 1.3,
+    11: 1.35,
+    12: 1.25,
+}
+# Category -> (mean transactions per month, typical amount, comments)
+VARIABLE_SPENDING = {
+    "Groceries": (9, 900, ["vegetables", "supermarket", "milk and bread"]),
+    "Food & Dining": (12, 450, ["lunch", "dinner", "coffee", "swiggy", "zomato"]),
+    "Transportation": (10, 180, ["uber", "ola", "metro", "auto"]),
+    "Fuel": (3, 1800, ["petrol"]),
+    "Shopping": (2.5, 2200, ["amazon", "clothes", "flipkart"]),
+    "Entertainment": (2, 700, ["movie", "concert", "games"]),
+    "Healthcare & Medical": (0.8, 1200, ["pharmacy", "doctor"]),
+    "Education": (0.3, 3000, ["books", "course"]),
+    "Travel": (0.25, 12000, ["flight", "hotel"]),
+    "Family&Friends": (0.8, 1500, ["gift", "dinner with family"]),
+    "Miscellaneous": (1.5, 400, ["misc"]),
+}
+# Categories that get the seasonal factor twice over
+SEASONAL_CATEGORIES = {"Shopping", "Travel", "Entertainment", "Family&Friends"}
+SUBSCRIPTIONS = [("netflix", 649), ("spotify", 119), ("prime", 299), ("gym", 1500)]
+
+
+def month_starts(months: int, end: date) -> list[date]:
+    first = end.replace(day=1)
+    starts = []
+    for _ in range(months):
+        starts.append(first)
+        first = (first - timedelta(days=1)).replace(day=1)
+    return starts[::-1]
+
+
+def days_in(month: date) -> int:
+    return ((month + timedelta(days=32)).replace(day=1) - month).days
+
+
+def money(rng: random.Random, typical: float) -> Decimal:
+    """Amount around typical, skewed like real spending"""
+    value = rng.lognormvariate(0, 0.5) * typical
+    return Decimal(str(round(max(value, 1.0), 2)))
+
+
+class UserProfile:
+    """Fixed monthly amounts for one synthetic user"""
+
+    def __init__(self, rng: random.Random):
+        self.salary = rng.randrange(30000, 250000, 1000)
+        self.rent = round(self.salary * rng.uniform(0.15, 0.3), -2)
+        self.scale = self.salary / 80000 * rng.uniform(0.7, 1.3)
+        self.subscriptions = rng.sample(SUBSCRIPTIONS, rng.randint(0, 3))
+        self.emi = round(self.salary * rng.uniform(0.1, 0.25), -2)
+        self.has_loan = rng.random() < 0.35
+        self.freelancer = rng.random() < 0.2
+
+
+def user_transactions(
+    rng: random.Random,
+    user_id: int,
+    months: list[date],
+    categories: dict[tuple[str, Type], int],
+    today: date,
+):
+    """Yield transaction rows for one user, oldest month first"""
+    profile = UserProfile(rng)
+
+    def row(name, type, amount, day, comment):
+        category_id = categories.get((name, type))
+        if category_id is None or day > today:
+            return None
+        return {
+            "user_id": user_id,
+            "category_id": category_id,
+            "amount": Decimal(str(amount)),
+            "type": type,
+            "comment": comment,
+            "date": day,
+        }
+
+    for month in months:
+        length = days_in(month)
+        season = SEASONALITY[month.month]
+        fixed = [
+            row("Salary", Type.Income, profile.salary, month, "salary"),
+            row(
+                "Bills & Utilities",
+                Type.Expense,
+                profile.rent,
+                month.replace(day=5),
+                "rent",
+            ),
+            row(
+                "Bills & Utilities",
+                Type.Expense,
+                money(rng, 2500 * season),
+                month.replace(day=min(length, 12)),
+                "electricity and internet",
+            ),
+        ]
+        for day, (name, amount) in enumerate(profile.subscriptions, start=7):
+            fixed.append(
+                row("Subscriptions", Type.Expense, amount, month.replace(day=day), name)
+            )
+        if profile.has_loan:
+            fixed.append(
+                row("EMI", Type.Expense, profile.emi, month.replace(day=10), "emi")
+            )
+        if profile.freelancer and rng.random() < 0.6:
+            fixed.append(
+                row(
+                    "Freelance",
+                    Type.Income,
+                    money(rng, profile.salary * 0.25),
+                    month.replace(day=rng.randint(1, length)),
+                    "freelance payment",
+                )
+            )
+        if month.month % 3 == 0 and rng.random() < 0.5:
+            fixed.append(
+                row(
+                    "Investments",
+                    Type.Income,
+                    money(rng, profile.salary * 0.05),
+                    month.replace(day=min(length, 28)),
+                    "dividend",
+                )
+            )
+        if rng.random() < 0.15:
+            fixed.append(
+                row(
+                    "Refund",
+                    Type.Income,
+                    money(rng, 800),
+                    month.replace(day=rng.randint(1, length)),
+                    "refund",
+                )
+            )
+        for transaction in fixed:
+            if transaction:
+                yield transaction
+
+        for name, (rate, typical, comments) in VARIABLE_SPENDING.items():
+            factor = season * (season if name in SEASONAL_CATEGORIES else 1)
+            count = poisson(rng, rate * factor)
+            for _ in range(count):
+                transaction = row(
+                    name,
+                    Type.Expense,
+                    money(rng, typical * profile.scale * factor),
+                    month.replace(day=rng.randint(1, length)),
+                    rng.choice(comments),
+                )
+                if transaction:
+                    yield transaction
+
+
+def poisson(rng: random.Random, mean: float) -> int:
+    """Knuth's method; the means here are small"""
+    limit, count, product = math.exp(-mean), 0, rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def create_users(connection, prefix: str, count: int, password: str) -> int:
+    """Insert the users that do not exist yet; returns how many were added"""
+    names = [f"{prefix}-{number:06d}" for number in range(count)]
+    existing = set(
+        connection.scalars(
+            select(User.username).where(User.username.like(f"{prefix}-%"))
+        )
+    )
+    missing = [name for name in names if name not in existing]
+    if missing:
+        hashed = get_password_hash(password)
+        connection.execute(
+            insert(User.__table__),
+            [{"username": name, "password": hashed} for name in missing],
+        )
+    return len(missing)
+
+
+def users_without_transactions(connection, prefix: str, count: int) -> list[int]:
+    """Ids of the first count users that have no transactions, in name order"""
+    names = {f"{prefix}-{number:06d}" for number in range(count)}
+    rows = connection.execute(
+        select(User.id, User.username)
+        .where(
+            User.username.like(f"{prefix}-%"),
+            ~exists().where(Transactions.user_id == User.id),
+        )
+        .order_by(User.username)
+    )
+    return [user_id for user_id, username in rows if username in names]
+
+
+def insert_chunk(connection, rows: list[dict]):
+    connection.execute(insert(Transactions.__table__), rows)
+    rollups.apply_deltas(connection, rollups.deltas_for_rows(rows))
+
+
+def main():
+    """Create the users and their transactions"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--prefix", default="synthetic")
+    parser.add_argument("--password", default="synthetic")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    try:
+        engine = create_db_engine()
+        with engine.begin() as connection:
+            categories = {
+                (category.name, category.type): category.id
+                for category in connection.execute(select(Category))
+            }
+            if not categories:
+                print("No categories found; run seed_data.py first.")
+                return 1
+            created = create_users(connection, args.prefix, args.users, args.password)
+            user_ids = users_without_transactions(connection, args.prefix, args.users)
+        print(
+            f"Created {created} users; {len(user_ids)} of {args.users} "
+            "need transactions."
+        )
+
+        rng = random.Random(args.seed)
+        today = date.today()
+        months = month_starts(args.months, today)
+        started, total, chunk = time.perf_counter(), 0, []
+        for user_id in user_ids:
+            # Chunks end on user boundaries so no history is left half written
+            chunk.extend(user_transactions(rng, user_id, months, categories, today))
+            if len(chunk) >= CHUNK_SIZE:
+                with engine.begin() as connection:
+                    insert_chunk(connection, chunk)
+                total += len(chunk)
+                chunk = []
+                elapsed = time.perf_counter() - started
+                print(f"  {total:,} rows ({total / elapsed:,.0f} rows/s)", end="\r")
+        if chunk:
+            with engine.begin() as connection:
+                insert_chunk(connection, chunk)
+            total += len(chunk)
+
+        elapsed = time.perf_counter() - started
+        print(
+            f"Inserted {total:,} transactions in {elapsed:.1f}s "
+            f"({total / max(elapsed, 1e-9):,.0f} rows/s)."
+        )
+        return 0
+
+    except Exception as e:
+        print(f"Error during data generation: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
@@ -1,11 +1,84 @@
-from fastapi import FastAPI
+import json
+import logging
+import logging.config
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
-from app.routers.api import api_users, api_transactions
-from app.routers import pages
+from app.routers.api import api_users, api_transactions, api_chat, api_dashboard
+from app.routers import metrics as metrics_router, pages
+from app import metrics
+from app.services import category_catalog
+from database import db_client, query_stats
+from config import LOGGING
+
+logging.config.dictConfig(LOGGING)
+request_logger = logging.getLogger("app.requests")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with db_client.AsyncSessionLocal() as db:
+        await category_catalog.catalog.get(db)
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.middleware("http")
+async def force_https_urls(request: Request, call_next):
+    if request.headers.get("x-forwarded-proto") == "https":
+        request.scope["scheme"] = "https"
+    response = await call_next(request)
+    return response
+
+
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    """Time each request and count and time the SQL it runs.
+
+    Records the route's latency and status for /metrics, adds a
+    Server-Timing header, logs one JSON line per request on app.requests and
+    warns about statements repeated often enough to be an N+1 pattern.
+    Queries run while a streaming body is sent are not counted.
+    """
+    started = time.perf_counter()
+    with query_stats.collect() as stats:
+        response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    total_ms = elapsed * 1000
+    route = request.scope.get("route")
+    metrics.observe_request(
+        request.method,
+        route.path if route else "unmatched",
+        response.status_code,
+        elapsed,
+    )
+    response.headers.append(
+        "Server-Timing", f"{stats.server_timing()}, app;dur={total_ms:.1f}"
+    )
+
+    record = {
+        "method": request.method,
+        "path": request.url.path,
+        "status": response.status_code,
+        "duration_ms": round(total_ms, 1),
+        "db_queries": stats.count,
+        "db_ms": round(stats.duration_ms, 1),
+    }
+    request_logger.info(json.dumps(record))
+    repeated = stats.repeated()
+    if repeated:
+        record["n_plus_one"] = [
+            {"count": count, "statement": " ".join(statement.split())[:300]}
+            for statement, count in repeated
+        ]
+        request_logger.warning(json.dumps(record))
+    return response
 
-app = FastAPI()
 
 app.mount(
     "/static",
@@ -15,4 +88,7 @@ app.mount(
 
 app.include_router(api_users.router)
 app.include_router(api_transactions.router)
+app.include_router(api_chat.router)
+app.include_router(api_dashboard.router)
 app.include_router(pages.router)
+app.include_router(metrics_router.router)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Recompute or verify the transaction_totals rollup
+
+    python rebuild_totals.py          # rebuild from the transactions table
+    python rebuild_totals.py --check  # report rows that disagree, no writes
+"""
+
+import sys
+from database.db_client import SessionLocal
+from database.rollups import check_totals, rebuild_totals
+
+
+def main(argv):
+    """Rebuild or check the rollup; returns non-zero on mismatches/errors"""
+    session = SessionLocal()
+    try:
+        if "--check" in argv:
+            mismatches = check_totals(session)
+            for (user_id, type, month), expected, stored in mismatches:
+                print(
+                    f"user {user_id} {type.value} {month:%Y-%m}: "
+                    f"expected {expected}, stored {stored}"
+                )
+            print(f"{len(mismatches)} mismatched rollup rows.")
+            return 1 if mismatches else 0
+
+        rows = rebuild_totals(session)
+        session.commit()
+        print(f"Rebuilt transaction_totals with {rows} rows.")
+        return 0
+
+    except Exception as e:
+        session.rollback()
+        print(f"Error during totals rebuild: {e}")
+        return 1
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    exit_code = main(sys.argv[1:])
+    sys.exit(exit_code)
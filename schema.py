@@ -47,7 +47,7 @@ class CreateTransaction(BaseTransactions):
 class Transactions(BaseTransactions):
     id : int 
     user_id : int
-    user : UserOut
+    user : Optional[UserOut] = None
 
     class config:
         orm_mode = True
@@ -1,122 +1,105 @@
 #!/usr/bin/env python3
 """
 Database seeding script to populate initial data
+
+The reference data lives in FIXTURES and is applied with one
+INSERT .. ON CONFLICT DO NOTHING per table, all in one transaction, so the
+script is cheap and safe to run on every deploy: rows that already exist
+are left untouched and only missing ones are added.
 """
 
 import sys
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from database.db_client import create_db_engine
 from database.models import Category, Type
 from config import DATABASE_URL
 
-
-def create_categories(session):
-    """Create initial categories if they don't exist"""
-
-    # Default expense categories
-    expense_categories = [
-        "Food & Dining",
-        "Groceries",
-        "Credit Card Bill",
-        "Home Loan",
-        "Personal Loan",
-        "EMI",
-        "Fuel",
-        "Subscriptions",
-        "Transportation",
-        "Shopping",
-        "Entertainment",
-        "Bills & Utilities",
-        "Healthcare & Medical",
-        "Education",
-        "Travel",
-        "Miscellaneous",
-        "Family&Friends",
-    ]
-
-    # Default income categories
-    income_categories = [
-        "Salary",
-        "Freelance",
-        "Business Income",
-        "Investments",
-        "Gifts",
-        "Other Income",
-        "Refund",
-    ]
-
-    categories_created = 0
-
-    # Create expense categories
-    for cat_name in expense_categories:
-        existing = (
-            session.query(Category)
-            .filter(Category.name == cat_name, Category.type == Type.Expense)
-            .first()
-        )
-
-        if not existing:
-            category = Category(name=cat_name, type=Type.Expense)
-            session.add(category)
-            categories_created += 1
-            print(f"Created expense category: {cat_name}")
-        else:
-            print(f" Expense category already exists: {cat_name}")
-
-    # Create income categories
-    for cat_name in income_categories:
-        existing = (
-            session.query(Category)
-            .filter(Category.name == cat_name, Category.type == Type.Income)
-            .first()
+# Default expense categories
+EXPENSE_CATEGORIES = [
+    "Food & Dining",
+    "Groceries",
+    "Credit Card Bill",
+    "Home Loan",
+    "Personal Loan",
+    "EMI",
+    "Fuel",
+    "Subscriptions",
+    "Transportation",
+    "Shopping",
+    "Entertainment",
+    "Bills & Utilities",
+    "Healthcare & Medical",
+    "Education",
+    "Travel",
+    "Miscellaneous",
+    "Family&Friends",
+]
+
+# Default income categories
+INCOME_CATEGORIES = [
+    "Salary",
+    "Freelance",
+    "Business Income",
+    "Investments",
+    "Gifts",
+    "Other Income",
+    "Refund",
+]
+
+# (model, columns of the unique key that identifies a row, rows), applied in
+# order; add an entry here to seed another table.
+FIXTURES = [
+    (
+        Category,
+        ["name"],
+        [{"name": name, "type": Type.Expense} for name in EXPENSE_CATEGORIES]
+        + [{"name": name, "type": Type.Income} for name in INCOME_CATEGORIES],
+    ),
+]
+
+
+def upsert_statement(dialect_name: str, model, key_columns: list[str], rows: list):
+    """One INSERT of every row that skips rows whose key already exists"""
+    dialect = postgresql if dialect_name == "postgresql" else sqlite
+    return (
+        dialect.insert(model.__table__)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=key_columns)
+    )
+
+
+def apply_fixtures(connection, fixtures=FIXTURES) -> dict[str, int]:
+    """Insert missing fixture rows; returns rows added per table"""
+    created = {}
+    for model, key_columns, rows in fixtures:
+        result = connection.execute(
+            upsert_statement(connection.dialect.name, model, key_columns, rows)
         )
-
-        if not existing:
-            category = Category(name=cat_name, type=Type.Income)
-            session.add(category)
-            categories_created += 1
-            print(f"Created income category: {cat_name}")
-        else:
-            print(f"Income category already exists: {cat_name}")
-
-    return categories_created
+        created[model.__tablename__] = result.rowcount
+    return created
 
 
 def main():
     """Main seeding function"""
     try:
-        # Create engine and session
-        engine = create_engine(DATABASE_URL)
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-        session = SessionLocal()
-
-        print("tarting database seeding...")
-
-        # Create categories
-        categories_created = create_categories(session)
-
-        # Commit changes
-        session.commit()
-
-        print(
-            f"Database seeding completed! Created {categories_created} new categories."
-        )
-
-        # Verify data
-        total_categories = session.query(Category).count()
-        expense_count = (
-            session.query(Category).filter(Category.type == Type.Expense).count()
-        )
-        income_count = (
-            session.query(Category).filter(Category.type == Type.Income).count()
-        )
-
-        print(f"atabase summary:")
-        print(f"Total categories: {total_categories}")
-        print(f"Expense categories: {expense_count}")
-        print(f"Income categories: {income_count}")
-
-        session.close()
+        engine = create_db_engine(DATABASE_URL, pooled=False)
+
+        print("Starting database seeding...")
+        with engine.begin() as connection:
+            created = apply_fixtures(connection)
+            counts = dict(
+                connection.execute(
+                    select(Category.type, func.count()).group_by(Category.type)
+                ).all()
+            )
+
+        for table, rows in created.items():
+            print(f"Seeded {table}: {rows} new rows.")
+        print("Database summary:")
+        print(f"Total categories: {sum(counts.values())}")
+        print(f"Expense categories: {counts.get(Type.Expense, 0)}")
+        print(f"Income categories: {counts.get(Type.Income, 0)}")
         return 0
 
     except Exception as e: